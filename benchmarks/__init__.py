@@ -0,0 +1,3 @@
+# benchmarks of the spec-parser, on synthetic models
+
+# SPDX-License-Identifier: Apache-2.0
@@ -0,0 +1,41 @@
+# benchmark of the memory used by the namespaces and entities of a loaded model
+
+# SPDX-License-Identifier: Apache-2.0
+
+import argparse
+import gc
+import logging
+import tempfile
+import tracemalloc
+
+from spec_parser import Model
+
+from .synthetic import add_model_args, gen_model, model_args
+
+GROUPS = ("classes", "properties", "vocabularies", "individuals", "datatypes")
+
+
+def measure_load(path):
+    """Return the model loaded from `path`, and the memory allocated by loading it that is still in use afterwards, in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    m = Model(path)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return m, after - before
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the memory used by the entities of a synthetic model, once loaded.")
+    add_model_args(parser, classes=20000)
+    opts = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as d:
+        p = gen_model(d, **model_args(opts))
+        m, size = measure_load(p)
+
+    n = len(m.namespaces) + sum(len(getattr(m, group)) for group in GROUPS)
+    print(f"{n} namespaces and entities: {size / 2**20:.1f} MiB, {size / n:.0f} bytes per entity")
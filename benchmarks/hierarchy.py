@@ -0,0 +1,25 @@
+# benchmark of the class hierarchy processing, on models of increasing size
+
+# SPDX-License-Identifier: Apache-2.0
+
+import argparse
+import logging
+import tempfile
+
+from spec_parser import Model
+
+from .synthetic import best_time, gen_model
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time Model.process_after_load on synthetic models of increasing size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2500, 5000, 10000, 20000], help="Numbers of classes.")
+    parser.add_argument("--depth", type=int, default=8, help="Depth of the class inheritance chains (default: 8).")
+    opts = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"{'classes':>8} {'seconds':>9} {'us/class':>9}")
+    for n in opts.sizes:
+        with tempfile.TemporaryDirectory() as d:
+            m = Model(gen_model(d, namespaces=8, classes=n, depth=opts.depth, props=2, words=5))
+            t, _ = best_time(m.process_after_load, 3)
+        print(f"{n:>8} {t:>9.3f} {t / n * 1e6:>9.1f}")
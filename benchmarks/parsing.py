@@ -0,0 +1,44 @@
+# benchmark of the parsing of model files, on a synthetic model
+
+# SPDX-License-Identifier: Apache-2.0
+
+import argparse
+import logging
+import tempfile
+
+from spec_parser.mdparsing import NestedListSection, SingleListSection, SpecFile
+
+from .synthetic import add_model_args, best_time, gen_model, model_args
+
+# the sections parsed as lists by the model loaders
+SINGLE_LISTS = ("Metadata", "Entries", "Property Values", "Format")
+NESTED_LISTS = ("Properties", "External properties restrictions")
+
+
+def parse_files(texts):
+    """Parse the files, given as (path, content), and their list sections, as the model loaders do."""
+    for f, text in texts:
+        sf = SpecFile()
+        sf.parse(text, f)
+        for name in SINGLE_LISTS:
+            if name in sf.sections:
+                SingleListSection(sf.sections[name], filename=f.name, context=name)
+        for name in NESTED_LISTS:
+            if name in sf.sections:
+                NestedListSection(sf.sections[name], filename=f.name, context=name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the parsing of the files of a synthetic model, read in memory beforehand.")
+    add_model_args(parser, classes=50000)
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs, the best one is reported (default: 3).")
+    opts = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as d:
+        p = gen_model(d, **model_args(opts))
+        texts = [(f, f.read_text(encoding="utf-8")) for f in sorted(p.rglob("*.md"))]
+
+    size = sum(len(text) for _, text in texts)
+    t, _ = best_time(lambda: parse_files(texts), opts.repeat)
+    print(f"{len(texts)} files, {size / 1024 / 1024:.1f} MiB: {t:.3f} s, {t / len(texts) * 1e6:.1f} us/file")
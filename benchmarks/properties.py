@@ -0,0 +1,44 @@
+# benchmark of the memory used by the inherited properties of classes, for increasing inheritance depths
+
+# SPDX-License-Identifier: Apache-2.0
+
+import argparse
+import logging
+import tempfile
+import time
+import tracemalloc
+
+from spec_parser import Model
+
+from .synthetic import gen_model
+
+
+def measure_process_after_load(model):
+    """Return the time taken by process_after_load, and the memory it allocated that is still in use afterwards, in bytes."""
+    model.process_after_load()  # so that the previous tables are not counted
+    for c in model.classes.values():
+        c.all_properties = dict()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    model.process_after_load()
+    t = time.perf_counter() - start
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return t, after - before
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the memory used by Model.process_after_load on synthetic models.")
+    parser.add_argument("--classes", type=int, default=4000, help="Number of classes (default: 4000).")
+    parser.add_argument("--depths", type=int, nargs="+", default=[2, 4, 8, 16], help="Depths of the class inheritance chains.")
+    parser.add_argument("--props", type=int, default=4, help="Number of properties per namespace (default: 4).")
+    opts = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"{'depth':>6} {'seconds':>9} {'MiB':>8} {'KiB/class':>10}")
+    for depth in opts.depths:
+        with tempfile.TemporaryDirectory() as d:
+            m = Model(gen_model(d, namespaces=8, classes=opts.classes, depth=depth, props=opts.props, words=5))
+            t, size = measure_process_after_load(m)
+        print(f"{depth:>6} {t:>9.3f} {size / 2**20:>8.1f} {size / opts.classes / 2**10:>10.2f}")
@@ -0,0 +1,38 @@
+# benchmark of the model snapshot format against the jsonpickle dump
+
+# SPDX-License-Identifier: Apache-2.0
+
+import argparse
+import logging
+import tempfile
+import warnings
+
+import jsonpickle
+
+from spec_parser import Model
+from spec_parser.jsondump import encode_jsondump
+from spec_parser.snapshot import decode_snapshot, encode_snapshot
+
+from .synthetic import add_model_args, best_time, gen_model, model_args
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the snapshot format with the jsonpickle dump of a synthetic model.")
+    add_model_args(parser, classes=1000)
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs of each step, the best one is shown (default: 3).")
+    opts = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    with tempfile.TemporaryDirectory() as d:
+        p = gen_model(d, **model_args(opts))
+        parse_time, m = best_time(lambda: Model(p), opts.repeat)
+
+    print(f"parsing the model files: {parse_time:.3f}s")
+    print(f"{'format':<12} {'encode s':>9} {'decode s':>9} {'size KiB':>9}")
+    for name, encode, decode in [
+        ("jsonpickle", lambda: encode_jsondump(m), jsonpickle.decode),
+        ("snapshot", lambda: encode_snapshot(m), decode_snapshot),
+    ]:
+        te, s = best_time(encode, opts.repeat)
+        td, _ = best_time(lambda s=s, decode=decode: decode(s), opts.repeat)
+        print(f"{name:<12} {te:>9.3f} {td:>9.3f} {len(s.encode('utf-8')) / 1024:>9.0f}")
@@ -0,0 +1,70 @@
+# benchmark of the imports done by a validation-only run, failing when they regress
+
+# SPDX-License-Identifier: Apache-2.0
+
+import argparse
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from .synthetic import gen_model
+
+MAIN = Path(__file__).parent.parent / "main.py"
+
+# modules of spec-parser, that are not in the standard library
+OWN_MODULES = ("customlogging", "runparams", "spec_parser")
+
+
+# run main.py, then print the names of the modules that were imported
+RUN_MAIN = "import runpy, sys; sys.argv = sys.argv[1:]; runpy.run_path(sys.argv[0], run_name='__main__'); print(*sys.modules)"
+
+
+def import_times(args):
+    """
+    Run python with `-X importtime` and the given arguments, and return the cumulative
+    import time of the top-level imports in microseconds, and the output of the run.
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True, text=True, check=True)
+    total = 0
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and not name[1:].startswith(" "):
+            total += int(cumulative)
+    return total, process.stdout
+
+
+def check_startup(model_path, repeat):
+    """Return the best import time of a validation run, without the interpreter startup, in ms, and its non-standard modules."""
+    best = None
+    for _ in range(repeat):
+        startup, before = import_times(["-c", "import sys; print(*sys.modules)"])
+        run, after = import_times(["-c", RUN_MAIN, str(MAIN), "-n", str(model_path)])
+        t = (run - startup) / 1000
+        best = t if best is None else min(best, t)
+    roots = {m.split(".")[0] for m in set(after.split()) - set(before.split())}
+    return best, sorted(m for m in roots if m not in sys.stdlib_module_names and m not in OWN_MODULES)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time the imports of a validation-only run (-n), and fail if they take too long or go beyond the standard library.",
+    )
+    parser.add_argument("--max-ms", type=float, default=100, help="Maximum import time in ms (default: 100).")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs, the best one is reported (default: 5).")
+    opts = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        t, extra = check_startup(gen_model(d), opts.repeat)
+
+    print(f"imports of a validation run: {t:.1f} ms (maximum: {opts.max_ms:.0f} ms)")
+    failed = False
+    if extra:
+        print(f"FAILED: modules imported beyond the standard library: {', '.join(extra)}")
+        failed = True
+    if t > opts.max_ms:
+        print("FAILED: the imports take too long")
+        failed = True
+    sys.exit(1 if failed else 0)
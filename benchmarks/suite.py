@@ -0,0 +1,137 @@
+# benchmark suite timing the loading of the model and each generator, compared with stored baselines
+
+# SPDX-License-Identifier: Apache-2.0
+
+import argparse
+import importlib
+import importlib.util
+import itertools
+import json
+import logging
+import shutil
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+from runparams import RunParams
+from spec_parser import Model
+from spec_parser.model import GENERATORS
+
+from .synthetic import add_model_args, best_time, gen_model, model_args
+
+BASELINE = Path(__file__).parent / "baseline.json"
+FORMAT = 2
+
+# modules and programs needed by each generator, that is skipped without them
+REQUIREMENTS = {
+    "jsondump": (("jsonpickle",), ()),
+    "mkdocs": (("jinja2",), ()),
+    "rdf": (("rdflib",), ()),
+    "tex": (("jinja2",), ("pandoc",)),
+    "singlefile": (("jinja2",), ()),
+}
+
+
+def available_generators():
+    def _available(g):
+        modules, programs = REQUIREMENTS.get(g, ((), ()))
+        return all(importlib.util.find_spec(m) for m in modules) and all(shutil.which(p) for p in programs)
+
+    return [g for g in GENERATORS if _available(g)]
+
+
+def run_scenario(d, args, generators, repeat):
+    """
+    Return the best times, in seconds, of the stages of a run on a synthetic model with the given arguments:
+    the discovery and parsing of the files, the processing after the load, and each generator.
+    """
+    p = gen_model(d, **args)
+    ret = dict()
+    ret["load"], _ = best_time(lambda: Model()._load(p, 1), repeat)  # noqa: SLF001 - without process_after_load, timed next
+    m = Model(p)
+    ret["process_after_load"], _ = best_time(m.process_after_load, repeat)
+
+    # the default parameters of a run; the generators are called directly, with their output directories
+    cfg = RunParams("benchmark", logging.getLogger(__name__), [str(p), "--no-output"])
+    runs = itertools.count()
+    for g in generators:
+        gen = getattr(importlib.import_module(f"spec_parser.{g}"), f"gen_{g}")
+
+        def _generate(g=g, gen=gen):
+            outpath = Path(d) / "output" / f"{g}{next(runs)}"
+            outpath.mkdir(parents=True)
+            gen(m, outpath, cfg)
+
+        ret[g], _ = best_time(_generate, repeat)
+    return ret
+
+
+def compare(results, baseline, tolerance, min_diff):
+    """Print the results next to the baseline ones, and return the number of regressions."""
+    regressions = 0
+    print(f"{'classes':>8} {'stage':<20} {'seconds':>9} {'baseline':>9} {'ratio':>6}")
+    for size, times in results.items():
+        for stage, t in times.items():
+            b = baseline.get(size, {}).get(stage)
+            if b is None:
+                print(f"{size:>8} {stage:<20} {t:>9.3f} {'-':>9} {'-':>6}")
+                continue
+            regressed = t > b * (1 + tolerance) and t - b > min_diff
+            regressions += regressed
+            print(f"{size:>8} {stage:<20} {t:>9.3f} {b:>9.3f} {t / b:>6.2f}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time Model.load, process_after_load and each generator on synthetic models, and compare with a stored baseline.",
+    )
+    add_model_args(parser)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 1000], help="Numbers of classes of the models, in place of --classes.")
+    parser.add_argument("--generators", type=str, help=f"Comma-separated generators to time (default: {','.join(GENERATORS)}).")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs, the best one is reported (default: 3).")
+    parser.add_argument("--baseline", type=str, default=str(BASELINE), help=f"Baseline file (default: {BASELINE}).")
+    parser.add_argument("--save", action="store_true", help="Save the results as the baseline, instead of comparing with it.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown (default: 0.25).")
+    parser.add_argument("--min-diff", type=float, default=0.05, help="Slowdowns of fewer seconds are ignored (default: 0.05).")
+    opts = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+    warnings.filterwarnings("ignore", module="rdflib")
+
+    generators = available_generators()
+    if opts.generators:
+        selected = opts.generators.split(",")
+        if unknown := [g for g in selected if g not in GENERATORS]:
+            parser.error(f"unknown generators: {', '.join(unknown)}")
+        generators = [g for g in generators if g in selected]
+    args = model_args(opts)
+    del args["classes"]
+
+    results = dict()
+    for size in opts.sizes:
+        with tempfile.TemporaryDirectory() as d:
+            results[str(size)] = run_scenario(d, {**args, "classes": size}, generators, opts.repeat)
+
+    baseline_path = Path(opts.baseline)
+    if opts.save:
+        data = {"format": FORMAT, "python": sys.version.split()[0], "model": args, "results": results}
+        baseline_path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        compare(results, dict(), opts.tolerance, opts.min_diff)
+        print(f"Saved the baseline in {baseline_path}")
+        sys.exit(0)
+
+    baseline = dict()
+    if baseline_path.is_file():
+        data = json.loads(baseline_path.read_text(encoding="utf-8"))
+        if data.get("format") != FORMAT or data.get("model") != args:
+            print(f"The baseline in {baseline_path} was measured with other parameters, it is not compared.")
+        else:
+            baseline = data["results"]
+    else:
+        print(f"No baseline in {baseline_path}, save one with --save.")
+
+    regressions = compare(results, baseline, opts.tolerance, opts.min_diff)
+    if regressions:
+        print(f"FAILED: {regressions} regressions")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,253 @@
+# generate a synthetic SPDX-like model tree, for benchmarking
+
+# SPDX-License-Identifier: Apache-2.0
+
+import argparse
+import random
+import shutil
+import time
+from pathlib import Path
+
+LICENSE = "SPDX-License-Identifier: Community-Spec-1.0"
+
+PROFILES = ("Software", "Security", "Licensing", "SimpleLicensing", "ExpandedLicensing", "Dataset", "AI", "Build", "Lite")
+
+WORDS = (
+    "element", "artifact", "package", "file", "snippet", "relationship", "agent", "tool", "person",
+    "organization", "annotation", "bundle", "bom", "collection", "identifier", "license", "hash",
+    "integrity", "verification", "vulnerability", "build", "dataset", "model", "profile", "extension",
+    "property", "value", "range", "type", "external", "reference", "namespace",
+)
+
+# one class out of every N has: an extension property, a vocabulary property,
+# an external property restriction, an abstract instantiability
+EXTENSION_EVERY = 5
+VOCABULARY_EVERY = 7
+RESTRICTION_EVERY = 3
+ABSTRACT_EVERY = 11
+
+
+def _text(rnd, nwords):
+    words = [rnd.choice(WORDS) for _ in range(nwords)]
+    words[0] = words[0].capitalize()
+    return " ".join(words) + "."
+
+
+def _description(rnd, nwords):
+    paras = [_text(rnd, max(1, nwords // 3)) for _ in range(3)]
+    paras[1] += " See `code_span` and *emphasis* with 50% & #hash_tag."
+    paras.append("- first item\n- second item with **bold**")
+    return "\n\n".join(paras)
+
+
+def _write(path, name, sections):
+    parts = [LICENSE, "", f"# {name}", ""]
+    for header, content in sections:
+        parts.extend([f"## {header}", "", content, ""])
+    path.write_text("\n".join(parts), encoding="utf-8")
+
+
+def gen_model(outpath, *, namespaces=3, classes=20, depth=4, props=3, words=30, seed=1):
+    """
+    Write a synthetic `model` directory in `outpath` and return its path.
+    The model has the given number of namespaces (at least Core and Extension),
+    and of classes, in inheritance chains of `depth` classes below Core/Element.
+    Every namespace defines `props` properties, used by its classes, and
+    descriptions are about `words` words long.
+    """
+    rnd = random.Random(seed)
+    p = Path(outpath) / "model"
+    if p.exists():
+        shutil.rmtree(p)
+    p.mkdir(parents=True)
+
+    nsnames = (["Core", "Extension", *PROFILES] + [f"Profile{i}" for i in range(namespaces)])[:max(namespaces, 2)]
+    for nsn in nsnames:
+        d = p / nsn
+        for sub in ("Classes", "Properties", "Vocabularies", "Individuals", "Datatypes"):
+            (d / sub).mkdir(parents=True)
+        sections = [
+            ("Summary", _text(rnd, 8)),
+            ("Description", _description(rnd, words)),
+            ("Metadata", f"- id: https://spdx.org/rdf/3/terms/{nsn}\n- name: {nsn}"),
+        ]
+        if nsn != "Core":
+            sections.append(("Profile conformance", _description(rnd, words)))
+        _write(d / f"{nsn}.md", nsn, sections)
+
+    # well-known entities used by the generators
+    core = p / "Core"
+    _write(
+        core / "Properties" / "spdxId.md",
+        "spdxId",
+        [
+            ("Summary", "Identifies an Element."),
+            ("Description", _description(rnd, words)),
+            ("Metadata", "- name: spdxId\n- Nature: DataProperty\n- Range: xsd:anyURI"),
+        ],
+    )
+    _write(
+        core / "Classes" / "Element.md",
+        "Element",
+        [
+            ("Summary", "Base domain class."),
+            ("Description", _description(rnd, words)),
+            ("Metadata", "- name: Element\n- SubclassOf: none\n- Instantiability: Abstract"),
+            ("Properties", "- spdxId\n  - type: xsd:anyURI\n  - minCount: 1\n  - maxCount: 1"),
+        ],
+    )
+    _write(
+        p / "Extension" / "Classes" / "Extension.md",
+        "Extension",
+        [
+            ("Summary", "Extension base class."),
+            ("Description", _description(rnd, words)),
+            ("Metadata", "- name: Extension\n- Instantiability: Abstract"),
+        ],
+    )
+    _write(
+        core / "Properties" / "extension.md",
+        "extension",
+        [
+            ("Summary", "Extension holder."),
+            ("Description", _description(rnd, words)),
+            ("Metadata", "- name: extension\n- Nature: ObjectProperty\n- Range: /Extension/Extension"),
+        ],
+    )
+    _write(
+        core / "Vocabularies" / "HashAlgorithm.md",
+        "HashAlgorithm",
+        [
+            ("Summary", "Hash algorithms."),
+            ("Description", _description(rnd, words)),
+            ("Metadata", "- name: HashAlgorithm"),
+            ("Entries", "\n".join(f"- {w}{i}: {_text(rnd, 6)} `x_{i}`" for i, w in enumerate(WORDS[:8]))),
+        ],
+    )
+    _write(
+        core / "Properties" / "algorithm.md",
+        "algorithm",
+        [
+            ("Summary", "Algorithm used."),
+            ("Description", _description(rnd, words)),
+            ("Metadata", "- name: algorithm\n- Nature: ObjectProperty\n- Range: HashAlgorithm"),
+        ],
+    )
+    _write(
+        core / "Datatypes" / "SemVer.md",
+        "SemVer",
+        [
+            ("Summary", "A semantic version."),
+            ("Description", _description(rnd, words)),
+            ("Metadata", "- name: SemVer\n- SubclassOf: xsd:string"),
+            ("Format", "- pattern: ^(0|[1-9]\\d*)\\.(0|[1-9]\\d*)$"),
+        ],
+    )
+    _write(
+        core / "Properties" / "version.md",
+        "version",
+        [
+            ("Summary", "A version."),
+            ("Description", _description(rnd, words)),
+            ("Metadata", "- name: version\n- Nature: DataProperty\n- Range: SemVer"),
+        ],
+    )
+    _write(
+        core / "Individuals" / "NoneElement.md",
+        "NoneElement",
+        [
+            ("Summary", "No element."),
+            ("Description", _description(rnd, words)),
+            ("Metadata", "- name: NoneElement\n- type: Element\n- IRI: https://spdx.org/rdf/3/terms/Core/NoneElement"),
+            ("Property Values", "- spdxId: none"),
+        ],
+    )
+
+    # synthetic classes, in inheritance chains of the given depth
+    known = [("/Core/Element", "Core", [("spdxId", "Core")])]
+    for nsn in nsnames:
+        d = p / nsn
+        for i in range(props):
+            pname = f"{nsn.lower()}Prop{i}"
+            rng = ("xsd:string", "xsd:integer", "/Core/SemVer" if nsn != "Core" else "SemVer")[i % 3]
+            _write(
+                d / "Properties" / f"{pname}.md",
+                pname,
+                [
+                    ("Summary", _text(rnd, 8)),
+                    ("Description", _description(rnd, words)),
+                    ("Metadata", f"- name: {pname}\n- Nature: DataProperty\n- Range: {rng}"),
+                ],
+            )
+
+    for i in range(classes):
+        nsn = nsnames[i % len(nsnames)]
+        name = f"Class{i}"
+        if i % depth == 0:
+            parent, pns, inherited = known[0]
+        else:
+            parent, pns, inherited = known[-1]
+        plines = []
+        pnames = []
+        for j in range(props):
+            pname = f"{nsn.lower()}Prop{j}"
+            rng = ("xsd:string", "xsd:integer", "/Core/SemVer" if nsn != "Core" else "SemVer")[j % 3]
+            if (pname, nsn) in inherited:
+                continue
+            pnames.append((pname, nsn))
+            plines.append(f"- {pname}\n  - type: {rng}\n  - maxCount: {j + 1}")
+        if i % EXTENSION_EVERY == 1 and nsn != "Core":
+            plines.append("- /Core/extension\n  - type: /Extension/Extension")
+        if i % VOCABULARY_EVERY == VOCABULARY_EVERY // 2 and nsn != "Core":
+            plines.append("- /Core/algorithm\n  - type: /Core/HashAlgorithm\n  - minCount: 1")
+        sections = [
+            ("Summary", _text(rnd, 8)),
+            ("Description", _description(rnd, words)),
+            (
+                "Metadata",
+                (
+                    f"- name: {name}\n- SubclassOf: {parent if pns != nsn else parent.rpartition('/')[-1]}\n"
+                    f"- Instantiability: {'Abstract' if i % ABSTRACT_EVERY == 0 else 'Concrete'}"
+                ),
+            ),
+        ]
+        if plines:
+            sections.append(("Properties", "\n".join(plines)))
+        if inherited and i % RESTRICTION_EVERY == RESTRICTION_EVERY - 1:
+            pn, pnns = inherited[-1]
+            sections.append(("External properties restrictions", f"- /{pnns}/{parent.rpartition('/')[-1]}/{pn}\n  - minCount: 7"))
+        _write(p / nsn / "Classes" / f"{name}.md", name, sections)
+        known.append((f"/{nsn}/{name}", nsn, inherited + pnames))
+
+    return p
+
+
+def best_time(f, repeat):
+    """Call `f` `repeat` times, and return the best time of a call in seconds, and the result of the last call."""
+    best = ret = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ret = f()
+        t = time.perf_counter() - start
+        best = t if best is None else min(best, t)
+    return best, ret
+
+
+def add_model_args(parser, *, classes=20):
+    parser.add_argument("--namespaces", type=int, default=3, help="Number of namespaces (default: 3).")
+    parser.add_argument("--classes", type=int, default=classes, help=f"Number of classes (default: {classes}).")
+    parser.add_argument("--depth", type=int, default=4, help="Depth of the class inheritance chains (default: 4).")
+    parser.add_argument("--props", type=int, default=3, help="Number of properties per namespace (default: 3).")
+    parser.add_argument("--words", type=int, default=30, help="Approximate length of descriptions in words (default: 30).")
+
+
+def model_args(opts):
+    return {k: getattr(opts, k) for k in ("namespaces", "classes", "depth", "props", "words")}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic SPDX-like model tree.")
+    parser.add_argument("outdir", type=str, help="Directory where the 'model' directory is created.")
+    add_model_args(parser)
+    opts = parser.parse_args()
+    print(gen_model(opts.outdir, **model_args(opts)))
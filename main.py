@@ -7,6 +7,8 @@ import sys
 from customlogging import error_printed, setup_logging
 from runparams import RunParams
 from spec_parser import Model
+from spec_parser.mdparsing import SpecFileCache, SpecFileStore
+from spec_parser.tracing import start_tracing
 
 if __name__ == "__main__":
     root_logger = setup_logging()
@@ -17,19 +19,60 @@ if __name__ == "__main__":
         root_logger.error("Errors were logged during the processing of parameters. Exiting.")
         sys.exit(1)
 
-    cfg.create_output_dirs()
+    if cfg.profile_path:
+        start_tracing(cfg.profile_path)
+
+    runs = cfg.version_params()
+    for run in runs:
+        run.create_output_dirs()
     if error_printed(root_logger):
         root_logger.error("Errors were logged during the creation of output directories. Exiting.")
         sys.exit(1)
 
-    m = Model(cfg.input_path)
-    if error_printed(root_logger):
-        root_logger.error("Errors were logged during the loading of the model. Exiting.")
-        sys.exit(1)
+    cache = SpecFileCache(cfg.cache_path / "parse") if cfg.cache_path else None
+    # with several versions, the files they have in common are parsed and held in memory once
+    store = SpecFileStore() if len(runs) > 1 else None
 
-    if not cfg.no_output:
-        m.generate(cfg)
+    for run in runs:
+        if len(runs) > 1:
+            root_logger.info(f"Building version {run.version_names[0]} from {run.input_path}")
+        if cfg.snapshot_path:
+            try:
+                m = Model.from_snapshot(cfg.snapshot_path)
+            except (OSError, ValueError) as e:
+                root_logger.error(f"Cannot load the model from snapshot '{cfg.snapshot_path}': {e}")  # noqa: TRY400 - no traceback for a bad file
+        else:
+            try:
+                m = Model(run.input_path, jobs=cfg.jobs, cache=cache, store=store)
+            except Exception:
+                # in watch mode, the model may be in the middle of an edit
+                if not cfg.watch:
+                    raise
+                root_logger.exception("Loading the model failed")
+            if cache is not None:
+                cache.save()
+        if error_printed(root_logger):
+            if not cfg.watch:
+                root_logger.error("Errors were logged during the loading of the model. Exiting.")
+                sys.exit(1)
+            # the whole model is loaded again on the first change
+            root_logger.error("Errors were logged during the loading of the model, waiting for changes.")
+            m = None
+            break
 
-    if error_printed(root_logger):
-        root_logger.error("Errors were logged during the generation of the output. Exiting.")
-        sys.exit(1)
+        if cfg.save_snapshot_path:
+            m.save_snapshot(cfg.save_snapshot_path)
+
+        if not cfg.no_output:
+            m.generate(run)
+
+        if error_printed(root_logger):
+            if not cfg.watch:
+                root_logger.error("Errors were logged during the generation of the output. Exiting.")
+                sys.exit(1)
+            root_logger.error("Errors were logged during the generation of the output, waiting for changes.")
+
+    if cfg.watch:
+        from spec_parser.watch import watch
+
+        watch(m, cfg)
@@ -3,23 +3,44 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import argparse
+import copy
+import copyreg
 import importlib.util
 import logging
+import os
 import shutil
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
 from types import SimpleNamespace
 
+from spec_parser.model import GENERATORS
+
+# the descriptions of the generators, in messages
+GENERATOR_DESCRIPTIONS = {
+    "jsondump": "JSON dump",
+    "mkdocs": "MkDocs",
+    "plantuml": "PlantUML",
+    "rdf": "RDF",
+    "tex": "TeX",
+    "webpages": "Web pages",
+    "singlefile": "singlefile Markdown document",
+}
+
+RDF_FORMATS = ("dot", "hext", "json-ld", "longturtle", "n3", "nt", "pretty-xml", "trig", "ttl", "xml")
+
 
 class RunParams(SimpleNamespace):
-    def __init__(self, name, logger):
+    def __init__(self, name, logger, args=None):
         self.logger = logger
         self.name = name
         self._ts = datetime.now(timezone.utc)
-        self.process_args()
+        self.process_args(args)
         self.check_requirements()
 
+    def __reduce__(self):
+        # copies, and worker processes, get the parameters as processed, without processing the arguments again
+        return copyreg.__newobj__, (type(self),), vars(self)
 
     @property
     def autogen_header(self):
@@ -57,7 +78,24 @@ class RunParams(SimpleNamespace):
             check_external_program("pandoc", "singlefile generation")
             check_import_module("jinja2", "singlefile generation")
 
-    def process_args(self, opts=sys.argv[1:]):
+    def process_args(self, opts=None):
+        """Set the parameters from the command-line arguments `opts`, by default those of sys.argv."""
+        parser = argument_parser(self.parser_version)
+        opts = parser.parse_args(opts)
+
+        if opts.verbose:
+            self.logger.setLevel(level=logging.INFO)
+        if opts.debug:
+            self.logger.setLevel(level=logging.DEBUG)
+
+        self._process_input_args(parser, opts)
+        self._process_version_args(parser, opts)
+        self._process_generator_args(opts)
+        self._process_output_args(opts)
+        self._process_rdf_args(opts)
+        self._process_resource_args(opts)
+
+    def _process_input_args(self, parser, opts):
         def check_input_path(p):
             if not p.exists():
                 raise argparse.ArgumentTypeError(f"Input directory '{p}' does not exist.")
@@ -66,64 +104,66 @@ class RunParams(SimpleNamespace):
             if p.name != "model":
                 raise argparse.ArgumentTypeError(f"Input directory '{p}' must be named 'model'.")
 
-        parser = argparse.ArgumentParser(description="Generate documentation from an SPDXv3 model.")
-
-        parser.add_argument("input_dir", type=str, help="Path to the input 'model' directory.")
-
-        parser.add_argument("-d", "--debug", action="store_true", help="Print spec-parser debug information.")
-        parser.add_argument("-f", "--force", action="store_true", help="Force overwrite of existing output directories.")
-        parser.add_argument("-j", "--generate-jsondump", action="store_true", help="Generate a dump of the model in JSON format.")
-        parser.add_argument("-J", "--output-jsondump", type=str, help="Output directory for JSON dump file.")
-        parser.add_argument("-m", "--generate-mkdocs", action="store_true", help="Generate MkDocs output.")
-        parser.add_argument("-M", "--output-mkdocs", type=str, help="Output directory for MkDocs files.")
-        parser.add_argument("-n", "--no-output", action="store_true", help="Perform no output generation, only input validation.")
-        parser.add_argument("-o", "--output", type=str, help="Single output directory for all output types.")
-        parser.add_argument("-p", "--generate-plantuml", action="store_true", help="Generate PlantUML output.")
-        parser.add_argument("-P", "--output-plantuml", type=str, help="Output directory for PlantUML files.")
-        parser.add_argument("-r", "--generate-rdf", action="store_true", help="Generate RDF output.")
-        parser.add_argument("-R", "--output-rdf", type=str, help="Output directory for RDF files.")
-        parser.add_argument("-t", "--generate-tex", action="store_true", help="Generate TeX output.")
-        parser.add_argument("-T", "--output-tex", type=str, help="Output directory for TeX files.")
-        parser.add_argument("-v", "--verbose", action="store_true", help="Print verbose information.")
-        parser.add_argument("-V", "--version", action="version", version=f"%(prog)s {self.parser_version}")
-        parser.add_argument("-w", "--generate-webpages", action="store_true", help="Generate web pages output.")
-        parser.add_argument("-W", "--output-webpages", type=str, help="Output directory for web pages.")
-        parser.add_argument("-x", "--generate-singlefile", action="store_true", help="Generate singlefile Markdown output.")
-        parser.add_argument("-X", "--output-singlefile", type=str, help="Output directory for singlefile Markdown file.")
-
-        opts = parser.parse_args()
-        gen_list = ["jsondump", "mkdocs", "plantuml", "rdf", "tex", "webpages", "singlefile"]
-        desc_list = ["JSON dump", "MkDocs", "PlantUML", "RDF", "TeX", "Web pages", "singlefile Markdown document"]
-
-        if opts.verbose:
-            self.logger.setLevel(level=logging.INFO)
-        if opts.debug:
-            self.logger.setLevel(level=logging.DEBUG)
+        if opts.from_snapshot:
+            if opts.input_dir:
+                parser.error("an input directory and --from-snapshot cannot be used together")
+            if opts.watch:
+                parser.error("--watch needs an input directory, not --from-snapshot")
+            self.input_path = None
+            self.input_paths = []
+            self.snapshot_path = Path(opts.from_snapshot)
+            if not self.snapshot_path.is_file():
+                self.logger.error(f"Snapshot file '{self.snapshot_path}' does not exist.")
+        elif opts.input_dir:
+            self.input_paths = [Path(d) for d in opts.input_dir]
+            for p in self.input_paths:
+                check_input_path(p)
+            self.input_path = self.input_paths[0] if len(self.input_paths) == 1 else None
+            self.snapshot_path = None
+        else:
+            parser.error("an input directory or --from-snapshot is required")
+        self.save_snapshot_path = Path(opts.save_snapshot) if opts.save_snapshot else None
 
-        self.input_path = Path(opts.input_dir)
-        check_input_path(self.input_path)
+    def _process_version_args(self, parser, opts):
+        # several versions of the model are built in subdirectories of the output directory,
+        # named after the directories containing their 'model' directories
+        self.version_names = [p.absolute().parent.name for p in self.input_paths]
+        if len(self.input_paths) > 1:
+            if opts.watch:
+                parser.error("--watch needs a single input directory")
+            if opts.save_snapshot:
+                parser.error("--save-snapshot needs a single input directory")
+            if any(getattr(opts, "output_" + g) for g in GENERATORS):
+                parser.error("with several input directories, only -o/--output can set the output directory")
+            if len(set(self.version_names)) < len(self.version_names):
+                parser.error("the input directories must be in directories with different names, which name their output directories")
 
+    def _process_generator_args(self, opts):
         if opts.no_output:
             self.no_output = True
-            if any(getattr(opts, "generate_" + g) for g in gen_list):
+            if any(getattr(opts, "generate_" + g) for g in GENERATORS):
                 self.logger.warning("Incompatible flag combination: -n/--no-output overwrites any generation")
-            for g in gen_list:
+            for g in GENERATORS:
                 setattr(self, "generate_" + g, False)
         else:
             self.no_output = False
-            if not any(getattr(opts, "generate_" + g) for g in gen_list):
-                for g in gen_list:
+            if not any(getattr(opts, "generate_" + g) for g in GENERATORS):
+                for g in GENERATORS:
                     setattr(self, "generate_" + g, True)
             else:
-                for g in gen_list:
+                for g in GENERATORS:
                     setattr(self, "generate_" + g, getattr(opts, "generate_" + g))
 
+    def _process_output_args(self, opts):
+        self.watch = opts.watch
+        self.incremental = opts.incremental or opts.watch
+
         if opts.output:
             self.output_path = Path(opts.output)
-            if self.output_path.exists() and not opts.force:
+            if self.output_path.exists() and not (opts.force or self.incremental):
                 self.logger.error(f"Output directory '{self.output_path}' already exists (use -f/--force to overwrite).")
 
-        for desc, g in zip(desc_list, gen_list):
+        for g in GENERATORS:
             genflag = "generate_" + g
             if getattr(self, genflag, False):
                 outdir = "output_" + g
@@ -133,23 +173,98 @@ class RunParams(SimpleNamespace):
                 elif p := getattr(self, "output_path", None):
                     setattr(self, outpath, p / g)
                 else:
-                    self.logger.error(f"{desc} was specified, but no output directory.")
+                    self.logger.error(f"{GENERATOR_DESCRIPTIONS[g]} was specified, but no output directory.")
                 if p := getattr(self, outpath, None):
-                    if p.exists() and not opts.force:
+                    if p.exists() and not (opts.force or self.incremental):
                         self.logger.error(f"Output directory '{p}' already exists (use -f/--force to overwrite).")
 
         self.force = opts.force
+        self.verify = opts.verify
+        self.singlefile_tree = opts.singlefile_tree
+
+    def _process_rdf_args(self, opts):
+        if opts.rdf_formats:
+            self.rdf_formats = [f.strip() for f in opts.rdf_formats.split(",") if f.strip()]
+            if unknown := [f for f in self.rdf_formats if f not in RDF_FORMATS]:
+                self.logger.error(f"Unknown RDF formats: {', '.join(unknown)} (known formats: {', '.join(RDF_FORMATS)}).")
+        else:
+            self.rdf_formats = list(RDF_FORMATS)
+
+    def _process_resource_args(self, opts):
+        self.jobs = opts.jobs if opts.jobs > 0 else os.cpu_count()
+        self.cache_path = Path(opts.cache_dir) if opts.cache_dir else None
+        self.cache_size = opts.cache_size * 1024 * 1024
+        self.profile_path = Path(opts.profile) if opts.profile else None
 
+    def version_params(self):
+        """
+        Return the parameters of each model to build: these ones for a single model, otherwise a copy for
+        each input directory, whose output directories are in the subdirectory of the output directory
+        named after the directory containing the input directory.
+        """
+        if len(self.input_paths) <= 1:
+            return [self]
+        ret = []
+        for name, p in zip(self.version_names, self.input_paths, strict=True):
+            cfg = copy.copy(self)
+            cfg.input_path = p
+            cfg.input_paths = [p]
+            cfg.version_names = [name]
+            if getattr(self, "output_path", None):
+                cfg.output_path = self.output_path / name
+                for g in GENERATORS:
+                    if getattr(self, "generate_" + g):
+                        setattr(cfg, "output_" + g + "_path", cfg.output_path / g)
+            ret.append(cfg)
+        return ret
 
     def create_output_dirs(self):
-        gen_list = ["jsondump", "mkdocs", "plantuml", "rdf", "tex", "webpages", "singlefile"]
-        for g in gen_list:
+        for g in GENERATORS:
             genflag = "generate_" + g
             if getattr(self, genflag, False):
                 outpath = "output_" + g + "_path"
                 p = getattr(self, outpath)
-                if self.force and p.exists():
+                if self.force and not self.incremental and p.exists():
                     shutil.rmtree(p)
-                p.mkdir(parents=True)
+                p.mkdir(parents=True, exist_ok=self.incremental)
+
+
+def argument_parser(version):
+    parser = argparse.ArgumentParser(description="Generate documentation from an SPDXv3 model.")
+
+    parser.add_argument("input_dir", type=str, nargs="*", help="Path to the input 'model' directory, or directories of several versions.")
+
+    parser.add_argument("--cache-dir", type=str, help="Directory for caches persisted across runs.")
+    parser.add_argument("--cache-size", type=int, default=256, help="Maximum size in MiB of each size-bounded cache (default: 256).")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of worker processes (0: one per CPU, default: 1).")
+    parser.add_argument("--rdf-formats", type=str, help=f"Comma-separated RDF serialization formats (default: {','.join(RDF_FORMATS)}).")
 
+    parser.add_argument("-d", "--debug", action="store_true", help="Print spec-parser debug information.")
+    parser.add_argument("--from-snapshot", type=str, help="Load the model from a snapshot file instead of an input directory.")
+    parser.add_argument("-f", "--force", action="store_true", help="Force overwrite of existing output directories.")
+    parser.add_argument("-i", "--incremental", action="store_true", help="Update existing output directories, only regenerating changes.")
+    parser.add_argument("-j", "--generate-jsondump", action="store_true", help="Generate a dump of the model in JSON format.")
+    parser.add_argument("-J", "--output-jsondump", type=str, help="Output directory for JSON dump file.")
+    parser.add_argument("-m", "--generate-mkdocs", action="store_true", help="Generate MkDocs output.")
+    parser.add_argument("-M", "--output-mkdocs", type=str, help="Output directory for MkDocs files.")
+    parser.add_argument("-n", "--no-output", action="store_true", help="Perform no output generation, only input validation.")
+    parser.add_argument("-o", "--output", type=str, help="Single output directory for all output types.")
+    parser.add_argument("-p", "--generate-plantuml", action="store_true", help="Generate PlantUML output.")
+    parser.add_argument("-P", "--output-plantuml", type=str, help="Output directory for PlantUML files.")
+    parser.add_argument("--profile", type=str, help="Write a Chrome trace of the time and memory spent in each phase to this file.")
+    parser.add_argument("-r", "--generate-rdf", action="store_true", help="Generate RDF output.")
+    parser.add_argument("-R", "--output-rdf", type=str, help="Output directory for RDF files.")
+    parser.add_argument("-t", "--generate-tex", action="store_true", help="Generate TeX output.")
+    parser.add_argument("-T", "--output-tex", type=str, help="Output directory for TeX files.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print verbose information.")
+    parser.add_argument("--save-snapshot", type=str, help="Save a snapshot of the loaded model to this file.")
+    parser.add_argument("--singlefile-tree", action="store_true", help="Also write every page of the singlefile document to a file.")
+    parser.add_argument("--verify", action="store_true", help="Cross-check the RDF context built from the model against the RDF graph.")
+    parser.add_argument("-V", "--version", action="version", version=f"%(prog)s {version}")
+    parser.add_argument("--watch", action="store_true", help="Keep running, and update the output when the input changes (implies -i).")
+    parser.add_argument("-w", "--generate-webpages", action="store_true", help="Generate web pages output.")
+    parser.add_argument("-W", "--output-webpages", type=str, help="Output directory for web pages.")
+    parser.add_argument("-x", "--generate-singlefile", action="store_true", help="Generate singlefile Markdown output.")
+    parser.add_argument("-X", "--output-singlefile", type=str, help="Output directory for singlefile Markdown file.")
 
+    return parser
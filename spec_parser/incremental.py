@@ -0,0 +1,128 @@
+# support for regenerating only the changed output files
+
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import json
+import logging
+from collections.abc import Mapping
+from importlib.resources import files
+
+from . import __version__
+
+logger = logging.getLogger(__name__)
+
+
+def _ref(o):
+    # chained tables, like the properties of classes, are fingerprinted as plain dicts
+    if isinstance(o, Mapping):
+        return dict(o)
+    # entities and namespaces referenced from the data of another one
+    return getattr(o, "fqname", None) or o.name
+
+
+def fingerprint(*parts):
+    """Return a digest of the given data, where model objects are represented by their names."""
+    s = json.dumps(parts, sort_keys=True, default=_ref)
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+
+def templates_fingerprint(package_path):
+    """Return a digest of the templates in the given directory of the package, and the parser version."""
+    h = hashlib.sha256(__version__.encode("utf-8"))
+    d = files("spec_parser").joinpath(package_path)
+    for f in sorted(d.iterdir(), key=lambda f: f.name):
+        h.update(f.name.encode("utf-8"))
+        h.update(f.read_bytes())
+    return h.hexdigest()
+
+
+def model_structure(model):
+    """Return the kind of every entity of the model, that links and type names depend on."""
+    return {
+        "classes": sorted(model.classes),
+        "properties": sorted(model.properties),
+        "vocabularies": sorted(model.vocabularies),
+        "individuals": sorted(model.individuals),
+        "datatypes": sorted(model.datatypes),
+    }
+
+
+class OutputManifest:
+    """
+    Fingerprints of the files generated in an output directory.
+    Each generated file is recorded with a fingerprint of all the data it is
+    rendered from, including the data of the other entities it shows,
+    like inherited properties or subclasses.
+    In incremental mode, a file whose fingerprint did not change since the
+    previous run is neither rendered nor written again, and files that are not
+    generated any more are removed; files not written keep the generation header,
+    and its timestamp, of the run that wrote them.
+    When not in incremental mode, the manifest does nothing.
+    """
+
+    FILENAME = ".spec-parser-manifest.json"
+
+    def __init__(self, outpath, salt, *, incremental):
+        self.outpath = outpath
+        self.salt = salt
+        self.incremental = incremental
+        self.previous = dict()
+        self.current = dict()
+        self.skipped = 0
+        if incremental:
+            f = outpath / self.FILENAME
+            try:
+                data = json.loads(f.read_text(encoding="utf-8"))
+                self.previous = data["files"]
+                if data["salt"] != salt:
+                    # keep the list of files, but regenerate all of them
+                    self.previous = dict.fromkeys(self.previous)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable manifest {f!s}: {e}")
+
+    def is_current(self, f, digest):
+        """Record the fingerprint of output file `f`, and return whether it is up to date."""
+        if not self.incremental:
+            return False
+        k = f.relative_to(self.outpath).as_posix()
+        self.current[k] = digest
+        if self.previous.get(k) == digest and f.is_file():
+            self.skipped += 1
+            return True
+        return False
+
+    def remove_obsolete(self):
+        """Remove the files of the previous run that were not recorded in this one."""
+        if not self.incremental:
+            return
+        for k in sorted(set(self.previous) - set(self.current)):
+            f = self.outpath / k
+            if f.is_file():
+                logger.info(f"Removing obsolete output file {f!s}")
+                f.unlink()
+                d = f.parent
+                while d != self.outpath and not any(d.iterdir()):
+                    d.rmdir()
+                    d = d.parent
+        self.previous = {k: v for k, v in self.previous.items() if k in self.current}
+
+    def save(self):
+        if not self.incremental:
+            return
+        self.remove_obsolete()
+        logger.info(f"{self.skipped} of {len(self.current)} files in {self.outpath!s} were up to date")
+        data = {"salt": self.salt, "files": self.current}
+        write_if_changed(self.outpath / self.FILENAME, json.dumps(data, indent=0, sort_keys=True))
+
+
+def write_if_changed(f, content):
+    """Write the file only if its content would change, so that its timestamp is kept otherwise."""
+    try:
+        if f.read_text(encoding="utf-8") == content:
+            return
+    except FileNotFoundError:
+        pass
+    f.write_text(content, encoding="utf-8")
@@ -2,14 +2,41 @@
 
 # SPDX-License-Identifier: Apache-2.0
 
+import copy
 import logging
+from collections import ChainMap
 
 import jsonpickle
+from jsonpickle.handlers import BaseHandler
+
+from .model import INDEX_ATTRIBUTES
 
 logger = logging.getLogger(__name__)
 
 
+class ChainMapHandler(BaseHandler):
+    """
+    Dump chained tables, like the properties of classes, as the dicts they stand for.
+    Their entries are shared between tables, and are copied so that they
+    are written in full in every table rather than as references.
+    """
+
+    def flatten(self, obj, _data):
+        return {k: self.context.flatten(dict(v), reset=False) for k, v in obj.items()}
+
+
+def encode_jsondump(model):
+    jsonpickle.register(ChainMap, ChainMapHandler)
+    # the lookup tables of the model are not part of the dump
+    dump = copy.copy(model)
+    for k in INDEX_ATTRIBUTES:
+        vars(dump).pop(k, None)
+    return jsonpickle.encode(dump, indent=2, warn=True)
+
+
 def gen_jsondump(model, outpath, cfg):
     f = outpath / "model.json"
-    f.write_text(jsonpickle.encode(model, indent=2, warn=True))
+    f.write_text(encode_jsondump(model))
 
+    f = outpath / "model.snapshot.json"
+    model.save_snapshot(f)
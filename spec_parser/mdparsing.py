@@ -2,8 +2,14 @@
 
 # SPDX-License-Identifier: Apache-2.0
 
+import hashlib
+import json
 import logging
 import re
+import sys
+
+from . import __version__
+from .tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -13,38 +19,253 @@ class SpecFile:
     RE_EXTRACT_NAME = re.compile(r"#\s+(\w+)\s*")
     RE_EXTRACT_HEADER_CONTENT = re.compile(r"##\s+(.*)\s+((.|\s)+)")
 
-    def __init__(self, fpath=None):
+    def __init__(self, fpath=None, cache=None, store=None):
+        # SpecFileCache and SpecFileStore used when loading, if any
+        self.cache = cache
+        self.store = store
         self.license = None
         self.sections = dict()
         if fpath is not None:
-            self.load(fpath)
+            with span("parse", "parse", file=fpath):
+                self.load(fpath)
 
     def load(self, fpath):
         logger.debug(f"### loading {fpath.parent}/{fpath.name}")
+        digest = None
+        if self.cache is not None:
+            digest, entry = self.cache.lookup(fpath)
+            if entry is not None:
+                if self.store is not None:
+                    entry = self.store.share(digest, entry)
+                self._load_entry(entry)
+                return
+
         filecontent = fpath.read_text(encoding="utf-8")
+        if self.store is not None:
+            # with a cache, the store is keyed by the digests of the cache
+            if digest is None:
+                digest = self.store.digest(filecontent)
+            entry = self.store.get(digest)
+            if entry is not None:
+                self._load_entry(entry)
+                return
+
+        clean = self.parse(filecontent, fpath)
 
+        # files with errors are not cached, so that the errors are reported again
+        if clean and (self.cache is not None or self.store is not None):
+            entry = {"license": self.license, "name": self.name, "sections": self.sections}
+            if self.cache is not None:
+                self.cache.put(fpath, entry)
+            if self.store is not None:
+                self.store.put(digest, entry)
+
+    def _load_entry(self, entry):
+        self.license = sys.intern(entry["license"])
+        self.name = sys.intern(entry["name"])
+        # a copy of the sections, sharing their content
+        self.sections = dict(entry["sections"])
+
+    def parse(self, filecontent, fpath):
+        """Parse the content of file `fpath`, and return whether it had no errors."""
+        clean = True
         parts = re.split(self.RE_SPLIT_TO_SECTIONS, filecontent)
 
         m = re.fullmatch(self.RE_EXTRACT_LICENSE, parts[0])
         if m is None:
             logger.error(f"File {fpath!s} does not start with license.")
+            clean = False
         else:
-            self.license = m.group(1)
+            self.license = sys.intern(m.group(1))
 
         m = re.fullmatch(self.RE_EXTRACT_NAME, parts[1])
         if m is None:
             logger.error(f"File {fpath!s} does not have name after license.")
+            clean = False
         else:
-            self.name = m.group(1)
+            self.name = sys.intern(m.group(1))
 
         for p in parts[2:]:
             if p.strip():
-                m = re.fullmatch(self.RE_EXTRACT_HEADER_CONTENT, p)
-                header = m.group(1)
-                content = m.group(2).strip()
+                header, content = self._header_content(p)
                 if content:
                     self.sections[header] = content
 
+        return clean
+
+    def _header_content(self, p):
+        # the usual "## header" line followed by some content is split without regex,
+        # giving the same result as RE_EXTRACT_HEADER_CONTENT, whose backtracking is slow on long sections
+        header, _, content = p.partition("\n")
+        rest = header[2:]
+        if header.startswith("##") and rest[:1].isspace() and not rest.isspace() and content:
+            return rest.lstrip(), content.strip()
+        m = re.fullmatch(self.RE_EXTRACT_HEADER_CONTENT, p)
+        return m.group(1), m.group(2).strip()
+
+
+class SpecFileCache:
+    """
+    Cache of parsed spec files, persisted as JSON in `path` if given.
+    The manifest maps each file path to its modification time, size and
+    content hash; files whose modification time or size changed are hashed
+    again, and only files whose content changed are parsed again.
+    The entries are the parsed files, keyed by content hash.
+    """
+
+    FORMAT = 1
+
+    def __init__(self, path=None):
+        self.path = path
+        self.manifest = dict()
+        self.entries = dict()
+        self.hits = 0
+        self.misses = 0
+        self._updates = dict()
+        self._seen = set()
+        self._missed = dict()
+        if path is not None:
+            self.load()
+
+    def _file(self):
+        return self.path / "specfiles.json"
+
+    def load(self):
+        f = self._file()
+        if not f.is_file():
+            return
+        try:
+            data = json.loads(f.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable parse cache {f!s}: {e}")
+            return
+        if data.get("format") != self.FORMAT or data.get("version") != __version__:
+            logger.info(f"Ignoring parse cache {f!s} from another spec-parser version")
+            return
+        self.manifest = {k: tuple(v) for k, v in data["manifest"].items()}
+        self.entries = data["entries"]
+
+    def save(self):
+        # keep only the files seen in this run
+        manifest = {k: v for k, v in self.manifest.items() if k in self._seen}
+        digests = {v[2] for v in manifest.values()}
+        data = {
+            "format": self.FORMAT,
+            "version": __version__,
+            "manifest": manifest,
+            "entries": {k: v for k, v in self.entries.items() if k in digests},
+        }
+        self.path.mkdir(parents=True, exist_ok=True)
+        f = self._file()
+        tmp = f.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        tmp.replace(f)
+
+    @staticmethod
+    def _key(fpath):
+        return str(fpath.resolve())
+
+    def _stat(self, fpath):
+        st = fpath.stat()
+        return st.st_mtime_ns, st.st_size
+
+    def get(self, fpath):
+        return self.lookup(fpath)[1]
+
+    def lookup(self, fpath):
+        """Return the content hash of file `fpath`, and its entry, or None if it is not cached."""
+        key = self._key(fpath)
+        self._seen.add(key)
+        stat = self._stat(fpath)
+        m = self.manifest.get(key)
+        if m is not None and m[:2] == stat and m[2] in self.entries:
+            self.hits += 1
+            return m[2], self.entries[m[2]]
+        digest = hashlib.sha256(fpath.read_bytes()).hexdigest()
+        if digest in self.entries:
+            self._set(key, (*stat, digest), None)
+            self.hits += 1
+            return digest, self.entries[digest]
+        self.misses += 1
+        self._missed[key] = (*stat, digest)
+        return digest, None
+
+    def put(self, fpath, entry):
+        key = self._key(fpath)
+        m = self._missed.pop(key, None) or (*self._stat(fpath), hashlib.sha256(fpath.read_bytes()).hexdigest())
+        self._set(key, m, entry)
+
+    def _set(self, key, m, entry):
+        self.manifest[key] = m
+        if entry is not None:
+            self.entries[m[2]] = entry
+        self._updates[key] = (m, entry)
+
+    def pop_updates(self):
+        """Return and forget the changes since the last call, to be merged by `apply_updates` in another process."""
+        ret = (self.hits, self.misses, self._seen, self._updates)
+        self.hits, self.misses, self._seen, self._updates = 0, 0, set(), dict()
+        return ret
+
+    def apply_updates(self, updates):
+        hits, misses, seen, changes = updates
+        self.hits += hits
+        self.misses += misses
+        self._seen |= seen
+        for key, (m, entry) in changes.items():
+            self._set(key, m, entry)
+
+
+class SpecFileStore:
+    """
+    Parsed spec files, in memory, keyed by content hash, shared by the models loaded in a run:
+    files with the same content, as in several versions of the model, are parsed and held once.
+    Unlike SpecFileCache, files are always read, but their paths are neither resolved nor checked.
+    With a SpecFileCache, the entries it returns are shared through the store too.
+    """
+
+    def __init__(self):
+        self.entries = dict()
+        self.hits = 0
+        self.misses = 0
+        self._updates = dict()
+
+    @staticmethod
+    def digest(filecontent):
+        return hashlib.sha256(filecontent.encode("utf-8")).hexdigest()
+
+    def get(self, digest):
+        entry = self.entries.get(digest)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, digest, entry):
+        self.entries[digest] = entry
+        self._updates[digest] = entry
+
+    def share(self, digest, entry):
+        """Return the entry with the given content hash, which is `entry` if there was none."""
+        if self.get(digest) is None:
+            self.put(digest, entry)
+        return self.entries[digest]
+
+    def pop_updates(self):
+        """Return and forget the changes since the last call, to be merged by `apply_updates` in another process."""
+        ret = (self.hits, self.misses, self._updates)
+        self.hits, self.misses, self._updates = 0, 0, dict()
+        return ret
+
+    def apply_updates(self, updates):
+        hits, misses, entries = updates
+        self.hits += hits
+        self.misses += misses
+        # the entries already here are kept, since they may be shared
+        for digest, entry in entries.items():
+            self.entries.setdefault(digest, entry)
+
 
 class Section:
     def __init__(self, content, filename=None, context=None):
@@ -63,42 +284,58 @@ class ContentSection(Section):
         self.content = content
 
 
-class SingleListSection(Section):
-    RE_EXTRACT_KEY_VALUE = re.compile(r"-\s+(\w+):\s+(.+)")
+# the list items are matched without regex, with the same result as the regexes in the comments
+
+
+def _is_word(s, extra=""):
+    # (\w|extra)+
+    for c in extra:
+        s = s.replace(c, "_")
+    return s.replace("_", "a").isalnum()
+
 
+def _list_key_value(l):
+    # -\s+(\w+):\s+(.+), returning the key and stripped value, or None
+    if not l.startswith("-") or not l[1:2].isspace():
+        return None
+    key, colon, val = l[1:].lstrip().partition(":")
+    if not colon or not _is_word(key) or not val[:1].isspace() or not val[1:]:
+        return None
+    # keys and values are mostly the same few words in all the files, that are kept once
+    return sys.intern(key), sys.intern(val.strip())
+
+
+class SingleListSection(Section):
     def load(self, content):
         self.content = content
         self.kv = dict()
         for i,l in enumerate(content.splitlines()):
-            m = re.fullmatch(self.RE_EXTRACT_KEY_VALUE, l)
+            m = _list_key_value(l)
             if m is None:
                 logger.error(self._fmt_err_msg("Single list parsing error", i+1, l))
             else:
-                key = m.group(1)
-                val = m.group(2).strip()
+                key, val = m
                 self.kv[key] = val
 
 
 class NestedListSection(Section):
-    RE_EXTRACT_TOP_LEVEL = re.compile(r"-\s+((\w|/)+)")
-    RE_EXTRACT_KEY_VALUE = re.compile(r"\s+-\s+(\w+):\s+(.+)")
-
     def load(self, content):
         self.content = content
         self.ikv = dict()
         for i,l in enumerate(content.splitlines()):
             if l.startswith("-"):
-                m = re.fullmatch(self.RE_EXTRACT_TOP_LEVEL, l)
-                if m is None:
+                # -\s+((\w|/)+)
+                name = l[1:].lstrip()
+                if not l[1:2].isspace() or not _is_word(name, "/"):
                     logger.error(self._fmt_err_msg("Top-level nested list parsing error", i+1, l))
                 else:
-                    item = m.group(1)
+                    item = sys.intern(name)
                     self.ikv[item] = dict()
             else:
-                m = re.fullmatch(self.RE_EXTRACT_KEY_VALUE, l)
+                # \s+-\s+(\w+):\s+(.+)
+                m = _list_key_value(l.lstrip()) if l[:1].isspace() else None
                 if m is None:
                     logger.error(self._fmt_err_msg("Nested list parsing error", i+1, l))
                 else:
-                    key = m.group(1)
-                    val = m.group(2).strip()
+                    key, val = m
                     self.ikv[item][key] = val
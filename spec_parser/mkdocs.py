@@ -4,51 +4,44 @@
 
 import logging
 
-from jinja2 import Environment, PackageLoader, select_autoescape
+from jinja2 import pass_context
+
+from .incremental import OutputManifest, fingerprint, model_structure, templates_fingerprint, write_if_changed
+from .model import attributes
+from .render import jinja_environment, write_pages
 
 logger = logging.getLogger(__name__)
 
 def gen_mkdocs(model, outpath, cfg):
-    jinja = Environment(
-        loader=PackageLoader("spec_parser", package_path="templates/mkdocs"),
-        autoescape=select_autoescape(),
-        trim_blocks=True,
-        lstrip_blocks=True,
-    )
-    jinja.globals = cfg.all_as_dict
-    jinja.globals["class_link"] = class_link
-    jinja.globals["property_link"] = property_link
-    jinja.globals["ext_property_link"] = ext_property_link
-    jinja.globals["type_link"] = lambda x, showshort=False: type_link(x, model, showshort=showshort)
-    jinja.globals["not_none"] = lambda x: str(x) if x is not None else ""
-
     p = outpath
+    salt = fingerprint(templates_fingerprint("templates/mkdocs"), model_structure(model))
+    manifest = OutputManifest(outpath, salt, incremental=cfg.incremental)
 
+    pages = []
     for ns in model.namespaces:
         d = p / ns.name
-        d.mkdir()
+        d.mkdir(exist_ok=True)
         f = d / f"{ns.name}.md"
+        if not manifest.is_current(f, fingerprint(attributes(ns))):
+            pages.append((f, "namespace.md.j2", ns))
 
-        template = jinja.get_template("namespace.md.j2")
-        page = template.render(vars(ns))
-        f.write_text(page)
-
-    def _generate_in_dir(dirname, group, tmplfname):
+    def _add_pages_in_dir(dirname, group, tmplfname):
         for s in group.values():
             in_ns = s.ns
             d = p / in_ns.name / dirname
             d.mkdir(exist_ok=True)
             f = d / f"{s.name}.md"
+            if not manifest.is_current(f, fingerprint(attributes(s))):
+                pages.append((f, tmplfname, s))
 
-            template = jinja.get_template(tmplfname)
-            page = template.render(vars(s))
-            f.write_text(page)
+    _add_pages_in_dir("Classes", model.classes, "class.md.j2")
+    _add_pages_in_dir("Properties", model.properties, "property.md.j2")
+    _add_pages_in_dir("Vocabularies", model.vocabularies, "vocabulary.md.j2")
+    _add_pages_in_dir("Individuals", model.individuals, "individual.md.j2")
+    _add_pages_in_dir("Datatypes", model.datatypes, "datatype.md.j2")
 
-    _generate_in_dir("Classes", model.classes, "class.md.j2")
-    _generate_in_dir("Properties", model.properties, "property.md.j2")
-    _generate_in_dir("Vocabularies", model.vocabularies, "vocabulary.md.j2")
-    _generate_in_dir("Individuals", model.individuals, "individual.md.j2")
-    _generate_in_dir("Datatypes", model.datatypes, "datatype.md.j2")
+    jinja_cache = cfg.cache_path / "jinja" if cfg.cache_path else None
+    write_pages(model, pages, jinja_env, (cfg.all_as_dict, jinja_cache), jobs=cfg.jobs)
 
     def _gen_filelist(nsname, itemslist, heading):
         ret = []
@@ -100,12 +93,25 @@ def gen_mkdocs(model, outpath, cfg):
         logger.warning("The following namespaces were not processed for MkDocs generation: %s", ", ".join(namespaces))
 
     fn = outpath / "class-hierarchy.md"
-    template = jinja.get_template("hierarchy.md.j2")
+    template = jinja_env(model, cfg.all_as_dict, jinja_cache).get_template("hierarchy.md.j2")
     page = template.render(vars(model))
-    fn.write_text(page)
+    write_if_changed(fn, page)
 
     fn = outpath / "model-files.yml"
-    fn.write_text("\n".join(filelines))
+    write_if_changed(fn, "\n".join(filelines))
+
+    manifest.save()
+
+
+def jinja_env(model, globals_, cache_path=None):
+    jinja = jinja_environment("templates/mkdocs", cache_path)
+    jinja.globals.update(globals_)
+    jinja.globals["class_link"] = class_link
+    jinja.globals["property_link"] = property_link
+    jinja.globals["ext_property_link"] = ext_property_link
+    jinja.globals["type_link"] = page_type_link(model)
+    jinja.globals["not_none"] = lambda x: str(x) if x is not None else ""
+    return jinja
 
 
 def class_link(name):
@@ -133,25 +139,26 @@ def ext_property_link(name):
     return ret
 
 
-def type_link(name, model, *, showshort=False):
+def page_type_link(model):
+    # short type names are relative to the namespace of the rendered page
+    @pass_context
+    def _type_link(context, name, *, showshort=False):
+        ns = context.get("ns")
+        return type_link(name, model, nsname=ns.name if ns else None, showshort=showshort)
+
+    return _type_link
+
+
+def type_link(name, model, *, nsname=None, showshort=False):
     if name.startswith("/"):
-        dirname = "Classes"
-        if name in model.vocabularies:
-            dirname = "Vocabularies"
-        elif name in model.datatypes:
-            dirname = "Datatypes"
+        t = model.resolve_type(name)
+        dirname = t.kind if t else "Classes"
         _, other_ns, name = name.split("/")
         showname = name if showshort else f"/{other_ns}/{name}"
         return f"[{showname}](../../{other_ns}/{dirname}/{name}.md)"
     elif name[0].isupper():
-        dirname = "Classes"
-        p = [x for x in model.vocabularies if x.endswith("/" + name)]
-        if len(p) > 0:
-            dirname = "Vocabularies"
-        else:
-            p = [x for x in model.datatypes if x.endswith("/" + name)]
-            if len(p) > 0:
-                dirname = "Datatypes"
+        t = model.resolve_type(name, nsname) or model.resolve_type(name)
+        dirname = t.kind if t else "Classes"
         return f"[{name}](../{dirname}/{name}.md)"
     else:
         return f"{name}"
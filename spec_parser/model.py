@@ -2,16 +2,48 @@
 
 # SPDX-License-Identifier: Apache-2.0
 
+import copy
+import importlib
 import logging
-from collections import defaultdict
-from copy import deepcopy
+import sys
+from collections import ChainMap, defaultdict, deque
+from pathlib import Path
+from types import SimpleNamespace
+from typing import NamedTuple
 
 from .mdparsing import ContentSection, NestedListSection, SingleListSection, SpecFile
+from .tracing import span
 
 logger = logging.getLogger(__name__)
 
+# namespaces and entities have __slots__, so that they take less memory, and no __dict__:
+# attributes() returns their attributes as a dict, in the place of vars(), in the order of
+# the slots, which is the order they are set by the constructors, kept in dumps and snapshots
+_UNSET = object()
+
+
+def attributes(o):
+    """Return the attributes of a namespace, entity or any other object as a dict, leaving out the slots that are not set."""
+    slots = getattr(type(o), "__slots__", None)
+    if slots is None:
+        return vars(o)
+    return {k: v for k in slots if (v := getattr(o, k, _UNSET)) is not _UNSET}
+
+
+class TypeRef(NamedTuple):
+    """A class, vocabulary or datatype, with the name of its namespace and the directory of its kind."""
+
+    ns: str
+    kind: str
+    fqname: str
+
+
+# attributes of Model set by _index_types, which are lookup tables left out of dumps
+INDEX_ATTRIBUTES = ("type_index", "short_type_names", "_reported_type_names")
+
+
 class Model:
-    def __init__(self, inpath=None):
+    def __init__(self, inpath=None, jobs=1, cache=None, store=None):
         self.name = None
         self.namespaces = []
         self.classes = dict()
@@ -21,72 +53,230 @@ class Model:
         self.datatypes = dict()
 
         if inpath is not None:
-            self.load(inpath)
+            self.load(inpath, jobs=jobs, cache=cache, store=store)
+
+    @classmethod
+    def from_snapshot(cls, fpath):
+        """Return the model saved by `save_snapshot` in file `fpath`, without parsing the model files."""
+        from .snapshot import load_snapshot
+        with span("load_snapshot"):
+            return load_snapshot(fpath)
+
+    def save_snapshot(self, fpath):
+        """Save the model in file `fpath`, in the compact format read by `from_snapshot`."""
+        from .snapshot import save_snapshot
+        with span("save_snapshot"):
+            save_snapshot(self, fpath)
+
+    def load(self, inpath, jobs=1, cache=None, store=None):
+        with span("load", jobs=jobs):
+            self._load(inpath, jobs, cache, store)
+        if cache is not None:
+            logger.info(f"Parse cache: {cache.hits} hits, {cache.misses} misses")
+        if store is not None:
+            logger.info(f"Parse store: {store.hits} hits, {store.misses} misses, {len(store.entries)} files")
+        self.process_after_load()
 
-    def load(self, inpath):
+    def _load(self, inpath, jobs, cache=None, store=None):
         p = inpath
 
-        for d in [d for d in p.iterdir() if d.is_dir() and d.name[0].isupper()]:
-            nsp = p / d.name / f"{d.name}.md"
-            if not nsp.is_file():
-                logger.error(f"Missing top-level namespace file {nsp.name}")
-                continue
+        todo = []
+        with span("discover"):
+            for d in [d for d in p.iterdir() if d.is_dir() and d.name[0].isupper()]:
+                nsp = p / d.name / f"{d.name}.md"
+                if not nsp.is_file():
+                    logger.error(f"Missing top-level namespace file {nsp.name}")
+                    continue
+
+                ns = Namespace(nsp, cache=cache, store=store)
+                self.namespaces.append(ns)
+
+                for dirname, (kind, group, namecheck) in ENTITY_DIRS.items():
+                    dp = p / d.name / dirname
+                    if dp.is_dir():
+                        todo.extend(
+                            (kind, f, ns, group)
+                            for f in dp.iterdir()
+                            if f.is_file() and namecheck(f.name[0]) and f.name.endswith(".md")
+                        )
+
+        if jobs > 1 and len(todo) > 1:
+            entities = _load_entities_parallel(todo, jobs, cache, store)
+        else:
+            entities = [kind(f, ns, cache=cache, store=store) for kind, f, ns, _ in todo]
 
-            ns = Namespace(nsp)
-            self.namespaces.append(ns)
-
-            dp = p / d.name / "Classes"
-            if dp.is_dir():
-                for f in [f for f in dp.iterdir() if f.is_file() and f.name[0].isupper() and f.name.endswith(".md")]:
-                    n = Class(f, ns)
-                    k = n.fqname
-                    self.classes[k] = n
-                    ns.classes[k] = n
-
-            dp = p / d.name / "Properties"
-            if dp.is_dir():
-                for f in [f for f in dp.iterdir() if f.is_file() and f.name[0].islower() and f.name.endswith(".md")]:
-                    n = Property(f, ns)
-                    k = n.fqname
-                    self.properties[k] = n
-                    ns.properties[k] = n
-
-            dp = p / d.name / "Vocabularies"
-            if dp.is_dir():
-                for f in [f for f in dp.iterdir() if f.is_file() and f.name[0].isupper() and f.name.endswith(".md")]:
-                    n = Vocabulary(f, ns)
-                    k = n.fqname
-                    self.vocabularies[k] = n
-                    ns.vocabularies[k] = n
-
-            dp = p / d.name / "Individuals"
-            if dp.is_dir():
-                for f in [f for f in dp.iterdir() if f.is_file() and f.name[0].isupper() and f.name.endswith(".md")]:
-                    n = Individual(f, ns)
-                    k = n.fqname
-                    self.individuals[k] = n
-                    ns.individuals[k] = n
-
-            dp = p / d.name / "Datatypes"
-            if dp.is_dir():
-                for f in [f for f in dp.iterdir() if f.is_file() and f.name[0].isupper() and f.name.endswith(".md")]:
-                    n = Datatype(f, ns)
-                    k = n.fqname
-                    self.datatypes[k] = n
-                    ns.datatypes[k] = n
+        for (_, _, ns, group), n in zip(todo, entities, strict=True):
+            k = n.fqname
+            getattr(self, group)[k] = n
+            getattr(ns, group)[k] = n
 
         logger.info(
             f"Loaded {len(self.namespaces)} namespaces, {len(self.classes)} classes, "
             f"{len(self.properties)} properties, {len(self.vocabularies)} vocabularies, "
             f"{len(self.individuals)} individuals, {len(self.datatypes)} datatypes",
         )
-        self.process_after_load()
 
-    def process_after_load(self):
-        self.types = self.classes | self.vocabularies | self.datatypes
-        logger.info(f"Total {len(self.types)} types")
+    def update(self, inpath, changed, jobs=1):
+        """
+        Update the model loaded from `inpath` after the given files were changed, added or removed.
+        Only the changed entity files are parsed again, any other change reloads the whole model.
+        When entities are only modified, the processing after the load is only redone for the
+        modified classes and their subclasses, see `_process_after_update`; when entities are
+        added or removed, it is redone for the whole model.
+        """
+        p = inpath
+        # the classes replaced by new versions: name -> previous version
+        replaced = dict()
+        structural = False
+        for f in sorted(changed):
+            rel = f.relative_to(p)
+            nsdir = rel.parent.parent
+            if not nsdir.name or nsdir.parent != Path() or rel.parent.name not in ENTITY_DIRS:
+                if rel.suffix == ".md" or f.is_dir():
+                    self._reload(inpath, jobs, f"{rel} changed")
+                    return
+                continue
+
+            kind, group, namecheck = ENTITY_DIRS[rel.parent.name]
+            ns = next((ns for ns in self.namespaces if ns.name == nsdir.name), None)
+            if ns is None or not namecheck(rel.name[0]) or rel.suffix != ".md":
+                continue
+
+            k = f"/{ns.name}/{rel.stem}"
+            if f.is_file():
+                logger.info(f"Parsing {rel}")
+                n = kind(f, ns)
+                if n.fqname != k:
+                    self._reload(inpath, jobs, f"the name in {rel} does not match the file name")
+                    return
+                prev = getattr(self, group).get(k)
+                if prev is None:
+                    structural = True
+                elif group == "classes":
+                    replaced.setdefault(k, prev)
+                getattr(self, group)[k] = n
+                getattr(ns, group)[k] = n
+            elif k in getattr(self, group):
+                logger.info(f"Removing {rel}")
+                structural = True
+                del getattr(self, group)[k]
+                del getattr(ns, group)[k]
+            else:
+                self._reload(inpath, jobs, f"{rel} was removed")
+                return
+
+        if structural:
+            self.process_after_load()
+        else:
+            self._process_after_update(replaced)
 
+    def _reload(self, inpath, jobs, reason):
+        logger.info(f"Reloading the whole model, since {reason}")
+        self.namespaces = []
+        for group in ENTITY_DIRS.values():
+            setattr(self, group[1], dict())
+        self.load(inpath, jobs=jobs)
+
+    def process_after_load(self):
+        with span("process_after_load"):
+            # reset what is computed here, so that it can run again after an update
+            for c in self.classes.values():
+                c.inheritance_stack = []
+                c.direct_subclasses = []
+                c.all_properties = dict()
+
+            with span("index_types", "process_after_load"):
+                self.types = self.classes | self.vocabularies | self.datatypes
+                logger.info(f"Total {len(self.types)} types")
+                self._index_types()
+
+            with span("used_in", "process_after_load"):
+                self._add_used_in()
+
+            with span("inheritance", "process_after_load"):
+                # add class inheritance stack
+                inheritances = []
+                for c in self.classes.values():
+                    parent = c.fqsupercname
+                    if parent:
+                        if parent not in self.classes:
+                            logger.error(f"Class {c.fqname} is a subclass of unknown class {parent}")
+                            continue
+                        inheritances.append((c.fqname, parent))
+                        self.classes[parent].direct_subclasses.append(c.fqname)
+
+                tree = defaultdict(list)
+                children = set()
+                nodes = set()
+                for child, parent in inheritances:
+                    tree[parent].append(child)
+                    children.add(child)
+                    nodes.add(parent)
+                    nodes.add(child)
+                self.class_hierarchy = dict(tree)
+                self.toplevel_classes = list(nodes - children)
+
+                # topological sort, parents first: Kahn's algorithm, where every class
+                # has at most one parent, so it is a traversal from the classes without parent
+                queue = deque(cn for cn in self.classes if cn not in children)
+                stack = []
+                while queue:
+                    cn = queue.popleft()
+                    stack.append(cn)
+                    queue.extend(tree.get(cn, ()))
+                if len(stack) < len(self.classes):
+                    self._report_cycles(stack)
+                for cn in stack:
+                    c = self.classes[cn]
+                    pcn = c.fqsupercname
+                    if pcn in self.classes:
+                        c.inheritance_stack = [pcn, *self.classes[pcn].inheritance_stack]
+
+            with span("all_properties", "process_after_load"):
+                for cn in stack:
+                    self._add_all_properties(self.classes[cn])
+
+    def _process_after_update(self, replaced):
+        """
+        Redo the processing after the load when entities were only replaced by new versions, and
+        the classes in `replaced` (name -> previous version) among them: the types and their index,
+        the class hierarchy and the inheritance stacks are kept, the properties are linked again
+        to the classes using them, and the inherited properties are only computed again for the
+        replaced classes and their subclasses.
+        The whole processing is redone when the parent of a class changed, or when the hierarchy
+        had errors, which are then reported again.
+        """
+        previous = [replaced.get(k, c) for k, c in self.classes.items()]
+        if any(self.classes[k].fqsupercname != c.fqsupercname for k, c in replaced.items()) or any(
+            c.fqsupercname and not c.inheritance_stack for c in previous
+        ):
+            self.process_after_load()
+            return
+
+        with span("process_after_update"):
+            self.types = self.classes | self.vocabularies | self.datatypes
+            for k, prev in replaced.items():
+                c = self.classes[k]
+                c.inheritance_stack = prev.inheritance_stack
+                c.direct_subclasses = prev.direct_subclasses
+
+            self._add_used_in()
+
+            # the replaced classes and their subclasses, parents first
+            todo = list(replaced)
+            done = set(todo)
+            for cn in todo:
+                for sub in self.class_hierarchy.get(cn, ()):
+                    if sub not in done:
+                        done.add(sub)
+                        todo.append(sub)
+            for cn in sorted(todo, key=lambda cn: len(self.classes[cn].inheritance_stack)):
+                self._add_all_properties(self.classes[cn])
+
+    def _add_used_in(self):
         # add used_in information to properties
+        for p in self.properties.values():
+            p.used_in = []
         for c in self.classes.values():
             for p, pkv in c.properties.items():
                 pname = "" if p.startswith("/") else f"/{c.ns.name}/"
@@ -97,106 +287,221 @@ class Model:
                     logger.error(f"In class {c.fqname}, property {p} has type {ptype} but the range of {pname} is {proptype}")
                 self.properties[pname].used_in.append(c.fqname)
 
-        # add class inheritance stack
-        inheritances = []
-        for c in self.classes.values():
-            parent = c.fqsupercname
-            if parent:
-                inheritances.append((c.fqname, parent))
-                self.classes[parent].direct_subclasses.append(c.fqname)
-
-        tree = defaultdict(list)
-        children = set()
-        nodes = set()
-        for child, parent in inheritances:
-            tree[parent].append(child)
-            children.add(child)
-            nodes.add(parent)
-            nodes.add(child)
-        self.class_hierarchy = dict(tree)
-        self.toplevel_classes = list(nodes - children)
-
-        def _tsort_recursive(inh, cn, visited, stack):
-            visited[cn] = True
-            for ipair in inh:
-                (chd, par) = ipair
-                if chd == cn:
-                    if not visited[par]:
-                        _tsort_recursive(inh, par, visited, stack)
-            stack.append(cn)
-
-        visited = {c.fqname: False for c in self.classes.values()}
-        stack = []
-        for c in self.classes.values():
-            if not visited[c.fqname]:
-                _tsort_recursive(inheritances, c.fqname, visited, stack)
-        for cn in stack:
-            c = self.classes[cn]
-            pcn = c.fqsupercname
-            while pcn:
-                c.inheritance_stack.append(pcn)
-                pcn = self.classes[pcn].fqsupercname
-
-        # add inherited properties to classes
-        for cn in stack:
-            c = self.classes[cn]
-            c.all_properties = dict()
-            for p, pkv in c.properties.items():
-                shortname = p.rpartition("/")[-1]
-                fullname = "" if p.startswith("/") else f"/{c.ns.name}/"
-                fullname += p
-                fulltype = "" if pkv["type"].startswith("/") or pkv["type"].startswith("xsd:") else f"/{c.ns.name}/"
-                fulltype += pkv["type"]
-                c.all_properties[shortname] = deepcopy(pkv)
-                c.all_properties[shortname]["fullname"] = fullname
-                c.all_properties[shortname]["fulltype"] = fulltype
-
-            if c.inheritance_stack:
-                p = c.inheritance_stack[0]
-                c.all_properties.update(deepcopy(self.classes[p].all_properties))
-
-            if c.ext_prop_restrs:
-                for p, pkv in c.ext_prop_restrs.items():
-                    (_, pns, _, shortname) = p.split("/")
-                    assert c.all_properties[shortname]["fullname"] == f"/{pns}/{shortname}"
-                    for k, v in pkv.items():
-                        if c.all_properties[shortname][k] == v:
-                            logger.warning(f"In class {c.fqname} property {p} has same {k} as the parent class")
-                        c.all_properties[shortname][k] = v
+    def _add_all_properties(self, c):
+        # add inherited properties to class c, whose parent has them already: the table of a class
+        # is a chain of its restricted properties, the table of its parent, and its own properties,
+        # so that inherited entries are shared and only copied when restricted
+        own = dict()
+        for p, pkv in c.properties.items():
+            shortname = p.rpartition("/")[-1]
+            fullname = "" if p.startswith("/") else f"/{c.ns.name}/"
+            fullname += p
+            fulltype = "" if pkv["type"].startswith("/") or pkv["type"].startswith("xsd:") else f"/{c.ns.name}/"
+            fulltype += pkv["type"]
+            own[shortname] = {**pkv, "fullname": fullname, "fulltype": fulltype}
+
+        restricted = dict()
+        if c.inheritance_stack:
+            p = c.inheritance_stack[0]
+            c.all_properties = ChainMap(restricted, self.classes[p].all_properties, own)
+        else:
+            c.all_properties = ChainMap(restricted, own)
+
+        if c.ext_prop_restrs:
+            for p, pkv in c.ext_prop_restrs.items():
+                (_, pns, _, shortname) = p.split("/")
+                assert c.all_properties[shortname]["fullname"] == f"/{pns}/{shortname}"
+                restricted[shortname] = entry = dict(c.all_properties[shortname])
+                for k, v in pkv.items():
+                    if entry[k] == v:
+                        logger.warning(f"In class {c.fqname} property {p} has same {k} as the parent class")
+                    entry[k] = v
+
+    def _index_types(self):
+        self.type_index = dict()
+        self.short_type_names = dict()
+        self._reported_type_names = set()
+        for kind in ("Classes", "Vocabularies", "Datatypes"):
+            for k, n in getattr(self, ENTITY_DIRS[kind][1]).items():
+                t = TypeRef(n.ns.name, kind, k)
+                self.type_index[k] = t
+                self.short_type_names.setdefault(n.name, []).append(t)
+
+    def resolve_type(self, name, nsname=None):
+        """
+        Return the TypeRef of class, vocabulary or datatype `name`, or None if there is no such type.
+        A short name is looked up in namespace `nsname` if given, otherwise in all the namespaces,
+        where a name defined in several namespaces is ambiguous, and reported once.
+        """
+        if name.startswith("/"):
+            return self.type_index.get(name)
+        if nsname is not None:
+            return self.type_index.get(f"/{nsname}/{name}")
+        candidates = self.short_type_names.get(name, ())
+        if len(candidates) > 1:
+            if name not in self._reported_type_names:
+                self._reported_type_names.add(name)
+                logger.warning(f"Ambiguous type name {name}, defined as {', '.join(t.fqname for t in candidates)}")
+            return None
+        return candidates[0] if candidates else None
+
+    def _report_cycles(self, sorted_classes):
+        # the classes left out of the topological sort are in cycles or below them: report each cycle once
+        done = set(sorted_classes)
+        for start in self.classes:
+            chain = []
+            cn = start
+            while cn not in done and cn not in chain:
+                chain.append(cn)
+                cn = self.classes[cn].fqsupercname
+            if cn in chain:
+                cycle = chain[chain.index(cn) :]
+                logger.error(f"Cycle in the class hierarchy: {' -> '.join([*cycle, cn])}")
+            done.update(chain)
 
     def generate(self, cfg):
-        if cfg.generate_jsondump:
-            from .jsondump import gen_jsondump
-            gen_jsondump(self, cfg.output_jsondump_path, cfg)
-        if cfg.generate_mkdocs:
-            from .mkdocs import gen_mkdocs
-            gen_mkdocs(self, cfg.output_mkdocs_path, cfg)
-        if cfg.generate_plantuml:
-            from .plantuml import gen_plantuml
-            gen_plantuml(self, cfg.output_plantuml_path, cfg)
-        if cfg.generate_rdf:
-            from .rdf import gen_rdf
-            gen_rdf(self, cfg.output_rdf_path, cfg)
-        if cfg.generate_tex:
-            from .tex import gen_tex
-            gen_tex(self, cfg.output_tex_path, cfg)
-        if cfg.generate_webpages:
-            from .webpages import gen_webpages
-            gen_webpages(self, cfg.output_webpages_path, cfg)
-        if cfg.generate_singlefile:
-            from .singlefile import gen_singlefile
-            gen_singlefile(self, cfg.output_singlefile_path, cfg)
+        """
+        Run the selected generators. With several jobs, they run concurrently in worker processes,
+        sharing the jobs, and their log records are handled here, in the order of GENERATORS.
+        """
+        selected = [g for g in GENERATORS if getattr(cfg, f"generate_{g}")]
+        if cfg.jobs > 1 and len(selected) > 1:
+            _generate_parallel(self, selected, cfg)
+            return
+        for g in selected:
+            _run_generator(self, g, cfg)
+
+
+class _RecordCollector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        # make the record picklable, as in logging.handlers.QueueHandler, keeping the traceback as text
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        self.records.append(record)
+
+
+# the parse cache and store, in load worker processes, and the model, in generator worker processes
+_worker = dict()
+
+
+def _init_load_worker(level, cache, store):
+    root = logging.getLogger()
+    root.handlers = [_RecordCollector()]
+    root.setLevel(level)
+    _worker["stores"] = (cache, store)
+    # drop what was inherited from the main process
+    for s in (cache, store):
+        if s is not None:
+            s.pop_updates()
+
+
+def _load_entity(args):
+    kind, fpath, nsname, nsiri = args
+    collector = logging.getLogger().handlers[0]
+    collector.records = []
+    cache, store = _worker["stores"]
+    n = kind(fpath, SimpleNamespace(name=nsname, iri=nsiri), cache=cache, store=store)
+    updates = [s.pop_updates() if s is not None else None for s in (cache, store)]
+    return n, collector.records, updates
+
+
+def _load_entities_parallel(todo, jobs, cache, store):
+    """
+    Parse the entity files in worker processes, returning the entities in the order of `todo`.
+    The workers get only the name and IRI of the namespace, the real one is attached afterwards.
+    Log records and parse cache and store updates of the workers are handled here, in order.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    args = [(kind, f, ns.name, ns.iri) for kind, f, ns, _ in todo]
+    chunksize = max(1, len(args) // (jobs * 4))
+    stores = (cache, store)
+    initargs = (logging.getLogger().level, *stores)
+    entities = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_load_worker, initargs=initargs) as ex:
+        for (_, _, ns, _), (n, records, updates) in zip(todo, ex.map(_load_entity, args, chunksize=chunksize), strict=True):
+            for r in records:
+                logging.getLogger(r.name).handle(r)
+            for s, u in zip(stores, updates, strict=True):
+                if u is not None:
+                    s.apply_updates(u)
+            n.ns = ns
+            entities.append(n)
+    return entities
+
+
+def _run_generator(model, g, cfg):
+    with span(g, "generator", jobs=cfg.jobs):
+        module = importlib.import_module(f".{g}", __package__)
+        getattr(module, f"gen_{g}")(model, getattr(cfg, f"output_{g}_path"), cfg)
+
+
+def _init_generate_worker(level, model):
+    root = logging.getLogger()
+    root.handlers = [_RecordCollector()]
+    root.setLevel(level)
+    _worker["model"] = model
+
+
+def _generate(g, cfg):
+    collector = logging.getLogger().handlers[0]
+    collector.records = []
+    try:
+        _run_generator(_worker["model"], g, cfg)
+    except Exception:
+        logger.exception(f"Generation of the {g} output failed")
+    return collector.records
+
+
+def _generate_parallel(model, selected, cfg):
+    from concurrent.futures import ProcessPoolExecutor
+
+    # the jobs are shared by the generators, for their own worker processes
+    gcfg = copy.copy(cfg)
+    gcfg.jobs = max(1, cfg.jobs // len(selected))
+    initargs = (logging.getLogger().level, model)
+    jobs = min(cfg.jobs, len(selected))
+    with (
+        span("generate", jobs=jobs),
+        ProcessPoolExecutor(max_workers=jobs, initializer=_init_generate_worker, initargs=initargs) as ex,
+    ):
+        futures = [ex.submit(_generate, g, gcfg) for g in selected]
+        for f in futures:
+            for r in f.result():
+                logging.getLogger(r.name).handle(r)
 
 
 class Namespace:
-    def __init__(self, fname):
+    __slots__ = (  # noqa: RUF023 - constructor order, kept in dumps, see attributes()
+        "classes",
+        "properties",
+        "vocabularies",
+        "individuals",
+        "datatypes",
+        "license",
+        "name",
+        "summary",
+        "description",
+        "metadata",
+        "conformance",
+        "iri",
+    )
+
+    def __init__(self, fname, cache=None, store=None):
         self.classes = dict()
         self.properties = dict()
         self.vocabularies = dict()
         self.individuals = dict()
         self.datatypes = dict()
 
-        sf = SpecFile(fname)
+        sf = SpecFile(fname, cache=cache, store=store)
         self.license = sf.license
         self.name = sf.name
 
@@ -223,6 +528,23 @@ class Namespace:
 
 
 class Class:
+    __slots__ = (  # noqa: RUF023 - constructor order, kept in dumps, see attributes()
+        "ns",
+        "license",
+        "name",
+        "fqname",
+        "summary",
+        "description",
+        "metadata",
+        "properties",
+        "ext_prop_restrs",
+        "iri",
+        "fqsupercname",
+        "inheritance_stack",
+        "direct_subclasses",
+        "all_properties",
+    )
+
     VALID_METADATA = (
         "Instantiability",
         "name",
@@ -234,14 +556,14 @@ class Class:
         "type",
     )
 
-    def __init__(self, fname, ns):
+    def __init__(self, fname, ns, cache=None, store=None):
         self.ns = ns
 
         # parsing
-        sf = SpecFile(fname)
+        sf = SpecFile(fname, cache=cache, store=store)
         self.license = sf.license
         self.name = sf.name
-        self.fqname = f"/{ns.name}/{sf.name}"
+        self.fqname = sys.intern(f"/{ns.name}/{sf.name}")
 
         s = ContentSection(sf.sections["Summary"], filename=self.fqname, context="summary")
         self.summary = s.content
@@ -279,7 +601,7 @@ class Class:
         if self.metadata.get("SubclassOf") == "none":
             del self.metadata["SubclassOf"]
         for prop in self.properties:
-            self.properties[prop]["fqname"] = prop if prop.startswith("/") else f"/{ns.name}/{prop}"
+            self.properties[prop]["fqname"] = prop if prop.startswith("/") else sys.intern(f"/{ns.name}/{prop}")
             if "minCount" not in self.properties[prop]:
                 self.properties[prop]["minCount"] = 0
             if "maxCount" not in self.properties[prop]:
@@ -288,7 +610,7 @@ class Class:
         parent = self.metadata.get("SubclassOf")
         if parent:
             if not parent.startswith("/"):
-                parent = f"/{ns.name}/{parent}"
+                parent = sys.intern(f"/{ns.name}/{parent}")
         self.fqsupercname = parent
 
         self.inheritance_stack = []
@@ -297,19 +619,21 @@ class Class:
 
 
 class Property:
+    __slots__ = ("ns", "license", "name", "fqname", "summary", "description", "metadata", "iri", "used_in")  # noqa: RUF023 - constructor order, kept in dumps, see attributes()
+
     VALID_METADATA = (
         "name",
         "Nature",
         "Range",
     )
 
-    def __init__(self, fname, ns):
+    def __init__(self, fname, ns, cache=None, store=None):
         self.ns = ns
 
-        sf = SpecFile(fname)
+        sf = SpecFile(fname, cache=cache, store=store)
         self.license = sf.license
         self.name = sf.name
-        self.fqname = f"/{ns.name}/{sf.name}"
+        self.fqname = sys.intern(f"/{ns.name}/{sf.name}")
 
         s = ContentSection(sf.sections["Summary"], filename=self.fqname, context="summary")
         self.summary = s.content
@@ -333,15 +657,17 @@ class Property:
 
 
 class Vocabulary:
+    __slots__ = ("ns", "license", "name", "fqname", "summary", "description", "metadata", "entries", "iri")  # noqa: RUF023 - constructor order, kept in dumps, see attributes()
+
     VALID_METADATA = ("name",)
 
-    def __init__(self, fname, ns):
+    def __init__(self, fname, ns, cache=None, store=None):
         self.ns = ns
 
-        sf = SpecFile(fname)
+        sf = SpecFile(fname, cache=cache, store=store)
         self.license = sf.license
         self.name = sf.name
-        self.fqname = f"/{ns.name}/{sf.name}"
+        self.fqname = sys.intern(f"/{ns.name}/{sf.name}")
 
         s = ContentSection(sf.sections["Summary"], filename=self.fqname, context="summary")
         self.summary = s.content
@@ -365,19 +691,21 @@ class Vocabulary:
 
 
 class Individual:
+    __slots__ = ("ns", "license", "name", "fqname", "summary", "description", "metadata", "values", "iri")  # noqa: RUF023 - constructor order, kept in dumps, see attributes()
+
     VALID_METADATA = (
         "name",
         "type",
         "IRI",
     )
 
-    def __init__(self, fname, ns):
+    def __init__(self, fname, ns, cache=None, store=None):
         self.ns = ns
 
-        sf = SpecFile(fname)
+        sf = SpecFile(fname, cache=cache, store=store)
         self.license = sf.license
         self.name = sf.name
-        self.fqname = f"/{ns.name}/{sf.name}"
+        self.fqname = sys.intern(f"/{ns.name}/{sf.name}")
 
         s = ContentSection(sf.sections["Summary"], filename=self.fqname, context="summary")
         self.summary = s.content
@@ -403,18 +731,20 @@ class Individual:
 
 
 class Datatype:
+    __slots__ = ("ns", "license", "name", "fqname", "summary", "description", "metadata", "format", "iri")  # noqa: RUF023 - constructor order, kept in dumps, see attributes()
+
     VALID_METADATA = (
         "name",
         "SubclassOf",
     )
 
-    def __init__(self, fname, ns):
+    def __init__(self, fname, ns, cache=None, store=None):
         self.ns = ns
 
-        sf = SpecFile(fname)
+        sf = SpecFile(fname, cache=cache, store=store)
         self.license = sf.license
         self.name = sf.name
-        self.fqname = f"/{ns.name}/{sf.name}"
+        self.fqname = sys.intern(f"/{ns.name}/{sf.name}")
 
         s = ContentSection(sf.sections["Summary"], filename=self.fqname, context="summary")
         self.summary = s.content
@@ -435,3 +765,18 @@ class Datatype:
 
         # processing
         self.iri = f"{self.ns.iri}/{self.name}"
+
+
+# the generators, in the order they run: each one is function gen_<name> of module <name>,
+# selected by RunParams attribute generate_<name>, writing to output_<name>_path
+GENERATORS = ("jsondump", "mkdocs", "plantuml", "rdf", "tex", "webpages", "singlefile")
+
+# entity files in each namespace directory:
+# subdirectory -> (entity class, attribute of Model and Namespace, check of the file name)
+ENTITY_DIRS = {
+    "Classes": (Class, "classes", str.isupper),
+    "Properties": (Property, "properties", str.islower),
+    "Vocabularies": (Vocabulary, "vocabularies", str.isupper),
+    "Individuals": (Individual, "individuals", str.isupper),
+    "Datatypes": (Datatype, "datatypes", str.isupper),
+}
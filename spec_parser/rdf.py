@@ -2,46 +2,111 @@
 
 # SPDX-License-Identifier: Apache-2.0
 
+import itertools
 import json
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 
 from rdflib import BNode, Graph, Literal, Namespace, URIRef
 from rdflib.collection import Collection
 from rdflib.namespace import DCTERMS, OWL, RDF, RDFS, SH, SKOS, XSD
 from rdflib.tools.rdf2dot import rdf2dot
 
+from .rdfwriter import NTriplesWriter, TripleTee, TurtleWriter
+from .tracing import span
+
 URI_BASE = "https://spdx.org/rdf/3/terms/"
 
 logger = logging.getLogger(__name__)
 
+# the formats written while the model is walked, without building a graph
+STREAMED_FORMATS = {"nt": NTriplesWriter, "ttl": TurtleWriter}
+
+
 def gen_rdf(model, outpath, cfg):
     p = outpath
 
-    ret = gen_rdf_ontology(model)
-    for ext in ["hext", "json-ld", "longturtle", "n3", "nt", "pretty-xml", "trig", "ttl", "xml"]:
-        f = p / ("spdx-model." + ext)
-        ret.serialize(f, format=ext, encoding="utf-8")
-
-    ctx = jsonld_context(ret)
+    formats = [ext for ext in cfg.rdf_formats if ext != "dot"]
+    streamed = [ext for ext in formats if ext in STREAMED_FORMATS]
+    formats = [ext for ext in formats if ext not in STREAMED_FORMATS]
+    diagram = "dot" in cfg.rdf_formats
+
+    # an rdflib graph is only built for the formats that need it
+    ret = Graph() if formats or diagram or cfg.verify else None
+    with span("ontology", "rdf", streamed=streamed), ExitStack() as stack:
+        writers = [stack.enter_context(STREAMED_FORMATS[ext](p / ("spdx-model." + ext))) for ext in streamed]
+        for w in writers:
+            if isinstance(w, TurtleWriter):
+                for ns in model.namespaces:
+                    w.bind(ns.name, ns.iri + "/")
+        sinks = [*writers, ret] if ret is not None else writers
+        gen_rdf_ontology(model, sinks[0] if len(sinks) == 1 else TripleTee(*sinks))
+
+    jobs = min(cfg.jobs, len(formats))
+    if jobs > 1:
+        # the workers get the graph once, as N-Triples with the namespace bindings,
+        # and serialize it while the context and the diagram are generated here
+        initargs = (ret.serialize(format="nt"), [(prefix, str(ns)) for prefix, ns in ret.namespaces()])
+        with (
+            span("serialize", "rdf", jobs=jobs),
+            ProcessPoolExecutor(max_workers=jobs, initializer=_init_serialize_worker, initargs=initargs) as ex,
+        ):
+            futures = [ex.submit(_serialize_graph, p / ("spdx-model." + ext), ext) for ext in formats]
+            gen_rdf_context_and_diagram(model, ret, p, verify=cfg.verify, diagram=diagram)
+            for future in futures:
+                future.result()
+    else:
+        for ext in formats:
+            f = p / ("spdx-model." + ext)
+            with span(ext, "rdf"):
+                ret.serialize(f, format=ext, encoding="utf-8")
+        gen_rdf_context_and_diagram(model, ret, p, verify=cfg.verify, diagram=diagram)
+
+
+def gen_rdf_context_and_diagram(model, g, p, *, verify=False, diagram=True):
+    ctx = jsonld_context(model)
+    if verify:
+        verify_jsonld_context(ctx, jsonld_context_from_graph(g))
     fn = p / "spdx-context.jsonld"
     with fn.open("w") as f:
         json.dump(ctx, f, sort_keys=True, indent=2)
 
-    fn = p / "spdx-model.dot"
-    with fn.open("w") as f:
-        rdf2dot(ret, f)
+    if diagram:
+        fn = p / "spdx-model.dot"
+        with fn.open("w") as f:
+            rdf2dot(g, f)
+
+
+# the graph to serialize, in worker processes
+_worker = dict()
 
 
-def xsd_range(rng, propname):
+def _init_serialize_worker(nt, namespaces):
+    g = Graph()
+    for prefix, ns in namespaces:
+        g.bind(prefix, ns, override=True, replace=True)
+    g.parse(data=nt, format="nt")
+    _worker["graph"] = g
+
+
+def _serialize_graph(f, ext):
+    _worker["graph"].serialize(f, format=ext, encoding="utf-8")
+
+
+def xsd_range(rng, propname, *, warn=True):
     if rng.startswith("xsd:"):
         return URIRef("http://www.w3.org/2001/XMLSchema#" + rng[4:])
 
-    logger.warning(f"Uknown namespace in range <{rng}> of property {propname}")
+    if warn:
+        logger.warning(f"Uknown namespace in range <{rng}> of property {propname}")
     return None
 
 
-def gen_rdf_ontology(model):
-    g = Graph()
+def gen_rdf_ontology(model, g=None):
+    """Add the triples of the ontology to `g`, an rdflib graph or a triple writer, or to a new graph, and return it."""
+    if g is None:
+        g = Graph()
     g.bind("spdx", Namespace(URI_BASE))
     OMG_ANN = Namespace("https://www.omg.org/spec/Commons/AnnotationVocabulary/")
     g.bind("omg-ann", OMG_ANN)
@@ -67,7 +132,14 @@ def gen_rdf_ontology(model):
     g.add((node, DCTERMS.title, Literal("System Package Data Exchange (SPDX) Ontology", lang="en")))
     g.add((node, OMG_ANN.copyright, Literal("Copyright (C) 2026 SPDX Project", lang="en")))
 
-    gen_rdf_classes(model, g)
+    # blank nodes are labelled in the order they are created, so that the output is the same on every run,
+    # and writers need no table of the labels
+    ids = itertools.count()
+
+    def new_bnode():
+        return BNode(f"b{next(ids)}")
+
+    gen_rdf_classes(model, g, new_bnode)
     gen_rdf_properties(model, g)
     #     gen_rdf_datatypes(model, g)
     gen_rdf_vocabularies(model, g)
@@ -75,6 +147,25 @@ def gen_rdf_ontology(model):
 
     return g
 
+def add_list(g, items, new_bnode=BNode):
+    """
+    Add an RDF list of the items, as rdflib.collection.Collection does, and return its head,
+    without reading the graph, so that it works with triple writers too.
+    The blank nodes of the list are created by `new_bnode`.
+    The head of an empty list is a blank node without triples.
+    """
+    head = node = new_bnode()
+    for i, item in enumerate(items):
+        if i > 0:
+            nxt = new_bnode()
+            g.add((node, RDF.rest, nxt))
+            node = nxt
+        g.add((node, RDF.first, item))
+    if items:
+        g.add((node, RDF.rest, RDF.nil))
+    return head
+
+
 def get_parent(model, c):
     parent = c.metadata.get("SubclassOf")
     if parent:
@@ -83,7 +174,30 @@ def get_parent(model, c):
     return None
 
 
-def gen_rdf_classes(model, g):
+def gen_rdf_known_classes_shape(model, g, extension, new_bnode=BNode):
+    """
+    Add the shape of the values that are instances of a known concrete class,
+    not derived from Extension, and return it.
+    It is shared by all the properties whose range is Extension.
+    """
+    node = URIRef(extension.iri + "/KnownClassShape")
+    g.add((node, RDF.type, SH.NodeShape))
+    members = []
+    for cls in model.classes.values():
+        if cls.metadata["Instantiability"] == "Abstract":
+            continue
+        cls_parent = get_parent(model, cls)
+        if cls_parent is not None and cls_parent.fqname == "/Extension/Extension":
+            continue
+        clsNode = new_bnode()
+        g.add((clsNode, SH["class"], URIRef(cls.iri)))
+        members.append(clsNode)
+    g.add((node, SH["or"], add_list(g, members, new_bnode)))
+    return node
+
+
+def gen_rdf_classes(model, g, new_bnode=BNode):
+    known_classes_shape = None
     for c in model.classes.values():
         node = URIRef(c.iri)
         g.add((node, RDF.type, OWL.Class))
@@ -93,10 +207,10 @@ def gen_rdf_classes(model, g):
         if p is not None:
             g.add((node, RDFS.subClassOf, URIRef(p.iri)))
         if c.metadata["Instantiability"] == "Abstract":
-            bnode = BNode()
+            bnode = new_bnode()
             g.add((node, SH.property, bnode))
             g.add((bnode, SH.path, RDF.type))
-            notNode = BNode()
+            notNode = new_bnode()
             g.add((bnode, SH["not"], notNode))
             g.add((notNode, SH["hasValue"], node))
             msg = Literal(
@@ -116,37 +230,24 @@ def gen_rdf_classes(model, g):
                 fqprop = c.properties[p]["fqname"]
                 if fqprop == "/Core/spdxId":
                     continue
-                bnode = BNode()
+                bnode = new_bnode()
                 g.add((node, SH.property, bnode))
                 prop = model.properties[fqprop]
                 g.add((bnode, SH.path, URIRef(prop.iri)))
                 prop_rng = prop.metadata["Range"]
-                if ":" not in prop_rng:
-                    typename = "" if prop_rng.startswith("/") else f"/{prop.ns.name}/"
-                    typename += prop_rng
-                else:
-                    typename = prop_rng
-                if typename in model.classes:
+                t = model.resolve_type(prop_rng, prop.ns.name) if ":" not in prop_rng else None
+                typename = t.fqname if t else prop_rng
+                if t and t.kind == "Classes":
                     dt = model.classes[typename]
 
                     # Extension subclasses cannot be validated, since they are
                     # unknown. Any unknown class is assumed to be derived from
                     # extension
                     if typename == "/Extension/Extension":
-                        extnode = BNode()
-                        lst = Collection(g, None)
-                        for cls in model.classes.values():
-                            if cls.metadata["Instantiability"] == "Abstract":
-                                continue
-                            cls_parent = get_parent(model, cls)
-                            if cls_parent is not None and cls_parent.fqname == "/Extension/Extension":
-                                continue
-                            clsNode = BNode()
-                            g.add((clsNode, SH["class"], URIRef(cls.iri)))
-                            lst.append(clsNode)
-                        notNode = BNode()
-                        g.add((extnode, SH["not"], notNode))
-                        g.add((notNode, SH["or"], lst.uri))
+                        if known_classes_shape is None:
+                            known_classes_shape = gen_rdf_known_classes_shape(model, g, dt, new_bnode)
+                        extnode = new_bnode()
+                        g.add((extnode, SH["not"], known_classes_shape))
                         msg = Literal(
                             "Class is known to not derive from Extension and cannot be used",
                             lang="en",
@@ -161,15 +262,12 @@ def gen_rdf_classes(model, g):
                         g.add((bnode, SH.nodeKind, SH.IRI))
                     else:
                         g.add((bnode, SH.nodeKind, SH.BlankNodeOrIRI))
-                elif typename in model.vocabularies:
+                elif t and t.kind == "Vocabularies":
                     dt = model.vocabularies[typename]
                     g.add((bnode, SH["class"], URIRef(dt.iri)))
                     g.add((bnode, SH.nodeKind, SH.IRI))
-                    lst = Collection(g, None)
-                    for e in dt.entries:
-                        lst.append(URIRef(dt.iri + "/" + e))
-                    g.add((bnode, SH["in"], lst.uri))
-                elif typename in model.datatypes:
+                    g.add((bnode, SH["in"], add_list(g, [URIRef(dt.iri + "/" + e) for e in dt.entries], new_bnode)))
+                elif t and t.kind == "Datatypes":
                     dt = model.datatypes[typename]
                     if "pattern" in dt.format:
                         g.add((bnode, SH.pattern, Literal(dt.format["pattern"])))
@@ -202,21 +300,20 @@ def gen_rdf_properties(model, g):
         # to add: g.add((node, RDFS.domain, xxx))
         elif p.metadata["Nature"] == "DataProperty":
             g.add((node, RDF.type, OWL.DatatypeProperty))
-        rng = p.metadata["Range"]
-        if ":" in rng:
-            t = xsd_range(rng, p.name)
-            if t:
-                g.add((node, RDFS.range, t))
-        else:
-            typename = "" if rng.startswith("/") else f"/{p.ns.name}/"
-            typename += rng
-            if typename in model.datatypes:
-                t = xsd_range(model.datatypes[typename].metadata["SubclassOf"], p.name)
-                if t:
-                    g.add((node, RDFS.range, t))
-            else:
-                dt = model.types[typename]
-                g.add((node, RDFS.range, URIRef(dt.iri)))
+        t = property_range(model, p)
+        if t is not None:
+            g.add((node, RDFS.range, t))
+
+
+def property_range(model, p, *, warn=True):
+    """Return the IRI of the range of property `p` in the ontology, or None if it has none."""
+    rng = p.metadata["Range"]
+    if ":" in rng:
+        return xsd_range(rng, p.name, warn=warn)
+    typeref = model.resolve_type(rng, p.ns.name)
+    if typeref.kind == "Datatypes":
+        return xsd_range(model.datatypes[typeref.fqname].metadata["SubclassOf"], p.name, warn=warn)
+    return URIRef(model.types[typeref.fqname].iri)
 
 
 def gen_rdf_vocabularies(model, g):
@@ -249,17 +346,89 @@ def gen_rdf_individuals(model, g):
         g.add((node, ci_ref("creationInfo"), ci_node))
         if i.summary:
             g.add((node, RDFS.comment, Literal(i.summary, lang="en")))
-        typ = i.metadata["type"]
-        typename = "" if typ.startswith("/") else f"/{i.ns.name}/"
-        typename += typ
-        dt = model.types[typename]
+        typeref = model.resolve_type(i.metadata["type"], i.ns.name)
+        dt = model.types[typeref.fqname]
         g.add((node, RDF.type, URIRef(dt.iri)))
         custom_iri = i.metadata.get("IRI")
         if custom_iri and custom_iri != i.iri:
             g.add((node, OWL.sameAs, URIRef(custom_iri)))
 
 
-def jsonld_context(g):
+def jsonld_context(model):
+    """
+    Return the JSON-LD context of the ontology generated for the model, built from the model.
+    It has a term for every class, property, vocabulary and individual of the ontology,
+    named after the IRI of the entity, prefixed by its namespace outside of Core.
+    """
+    # vocabularies whose entries are listed in the shape of a class property
+    vocab_classes = set()
+    for c in model.classes.values():
+        for pkv in c.properties.values():
+            if pkv["fqname"] == "/Core/spdxId":
+                continue
+            prop = model.properties[pkv["fqname"]]
+            t = model.resolve_type(prop.metadata["Range"], prop.ns.name)
+            if t and t.kind == "Vocabularies" and model.vocabularies[t.fqname].entries:
+                vocab_classes.add(model.vocabularies[t.fqname].iri)
+    owl_classes = {n.iri for n in model.classes.values()} | {n.iri for n in model.vocabularies.values()}
+
+    def get_property_term(p, iri):
+        rng = property_range(model, p, warn=False)
+        if rng is None:
+            return iri
+        rng = str(rng)
+        if p.metadata["Nature"] == "ObjectProperty":
+            if rng in vocab_classes:
+                return {"@id": iri, "@type": "@vocab", "@context": {"@vocab": rng + "/"}}
+            if rng in owl_classes:
+                return {"@id": iri, "@type": "@vocab"}
+        elif p.metadata["Nature"] == "DataProperty":
+            return {"@id": iri, "@type": rng}
+        return iri
+
+    subjects = [(n.iri, n.iri) for n in (*model.classes.values(), *model.vocabularies.values(), *model.individuals.values())]
+    subjects.extend((p.iri, get_property_term(p, p.iri)) for fqname, p in model.properties.items() if fqname != "/Core/spdxId")
+
+    terms = dict()
+    for subject, term in sorted(subjects, key=lambda x: x[0]):
+        try:
+            base, ns, name = subject.rsplit("/", 2)
+        except ValueError:
+            continue
+
+        if base != URI_BASE.rstrip("/"):
+            continue
+
+        key = name if ns == "Core" else ns.lower() + "_" + name
+
+        if key in terms:
+            current = terms[key]["@id"] if isinstance(terms[key], dict) else terms[key]
+            logger.error(f"ERROR: Duplicate context key '{key}' for '{subject}'. Already mapped to '{current}'")
+            continue
+
+        terms[key] = term
+
+    terms["spdx"] = URI_BASE
+    terms["spdxId"] = "@id"
+    terms["type"] = "@type"
+
+    return {"@context": terms}
+
+
+def verify_jsonld_context(ctx, expected):
+    """Log the differences between the context built from the model and the one derived from the graph."""
+    ctx = json.loads(json.dumps(ctx))
+    expected = json.loads(json.dumps(expected))
+    terms, expected_terms = ctx["@context"], expected["@context"]
+    for key in sorted(terms.keys() | expected_terms.keys()):
+        if terms.get(key) != expected_terms.get(key):
+            logger.error(f"JSON-LD context term '{key}' is {terms.get(key)}, but the RDF graph gives {expected_terms.get(key)}")
+    if terms == expected_terms:
+        logger.info(f"Verified the {len(terms)} terms of the JSON-LD context against the RDF graph")
+
+
+def jsonld_context_from_graph(g):
+    """Return the JSON-LD context derived from the RDF graph of the ontology, probing the graph for every subject."""
     terms = dict()
 
     def get_subject_term(subject):
@@ -0,0 +1,141 @@
+# writing RDF triples directly to N-Triples and Turtle files, without an rdflib Graph
+
+# SPDX-License-Identifier: Apache-2.0
+
+import re
+
+from rdflib import BNode, Literal, URIRef
+from rdflib.namespace import DCTERMS, OWL, RDF, RDFS, SH, XSD
+
+
+class TripleWriter:
+    """
+    Base of the streaming writers: each triple added is written at once, so that
+    memory use does not grow with the number of triples.
+    Blank nodes are written with their own labels, which gen_rdf_ontology assigns
+    in the order they are created, so that the output is the same on every run.
+    Writers have the `add` and `bind` methods of rdflib graphs used by the generators,
+    and are context managers closing the file.
+    """
+
+    def __init__(self, fpath):
+        self.f = fpath.open("w", encoding="utf-8")
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.f.close()
+
+    def bind(self, prefix, namespace, **kwargs):
+        pass
+
+    def add(self, triple):
+        self.count += 1
+        self.f.write(" ".join(self.term(t) for t in triple) + " .\n")
+
+    def term(self, t):
+        if isinstance(t, BNode):
+            return f"_:{t}"
+        if isinstance(t, Literal):
+            s = '"' + _escape(str(t)) + '"'
+            if t.language:
+                return f"{s}@{t.language}"
+            if t.datatype:
+                return f"{s}^^{self.term(t.datatype)}"
+            return s
+        return f"<{_escape_iri(str(t))}>"
+
+
+class NTriplesWriter(TripleWriter):
+    """Write triples as N-Triples, one line per triple."""
+
+
+class TurtleWriter(TripleWriter):
+    """
+    Write triples as Turtle: IRIs in the bound namespaces are written as prefixed names,
+    and consecutive triples with the same subject are grouped in one statement.
+    The triples are not buffered, so a subject whose triples are interleaved with the ones
+    of other subjects, like a class and the blank nodes of its property shapes, is written
+    in several statements, unlike rdflib, which groups and sorts all the triples of a graph.
+    """
+
+    # the prefixes of the vocabularies used by the generators
+    PREFIXES = (("dcterms", DCTERMS), ("owl", OWL), ("rdf", RDF), ("rdfs", RDFS), ("sh", SH), ("xsd", XSD))
+    RE_LOCAL_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_-]*")
+
+    def __init__(self, fpath):
+        super().__init__(fpath)
+        self.prefixes = dict(self.PREFIXES)
+        self.subject = None
+
+    def bind(self, prefix, namespace, **_kwargs):
+        self.prefixes[prefix] = namespace
+
+    def _write_prefixes(self):
+        # longest namespaces first, so that IRIs get the most specific prefix
+        self.namespaces = sorted(((str(ns), prefix) for prefix, ns in self.prefixes.items()), key=lambda x: -len(x[0]))
+        for prefix, ns in sorted(self.prefixes.items()):
+            self.f.write(f"@prefix {prefix}: <{ns}> .\n")
+        self.f.write("\n")
+
+    def add(self, triple):
+        if self.count == 0:
+            self._write_prefixes()
+        self.count += 1
+        s, p, o = (self.term(t) for t in triple)
+        if triple[1] == RDF.type:
+            p = "a"
+        if s == self.subject:
+            self.f.write(f" ;\n    {p} {o}")
+        else:
+            if self.subject is not None:
+                self.f.write(" .\n\n")
+            self.subject = s
+            self.f.write(f"{s} {p} {o}")
+
+    def close(self):
+        if self.count == 0:
+            self._write_prefixes()
+        elif self.subject is not None:
+            self.f.write(" .\n")
+        super().close()
+
+    def term(self, t):
+        if isinstance(t, URIRef):
+            iri = str(t)
+            for ns, prefix in self.namespaces:
+                if iri.startswith(ns) and self.RE_LOCAL_NAME.fullmatch(iri[len(ns) :]):
+                    return f"{prefix}:{iri[len(ns) :]}"
+        return super().term(t)
+
+
+class TripleTee:
+    """Send the triples and namespace bindings to several graphs or writers."""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def bind(self, prefix, namespace, **kwargs):
+        for sink in self.sinks:
+            sink.bind(prefix, namespace, **kwargs)
+
+    def add(self, triple):
+        for sink in self.sinks:
+            sink.add(triple)
+
+
+def _escape(s):
+    return s.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+
+
+# the characters not allowed in IRIs, in N-Triples and Turtle, where they can only be written as \u escapes
+RE_IRI_ESCAPE = re.compile(r'[\x00-\x20<>"{}|^`\\]')
+
+
+def _escape_iri(s):
+    return RE_IRI_ESCAPE.sub(lambda m: f"\\u{ord(m.group()):04X}", s)
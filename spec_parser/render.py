@@ -0,0 +1,125 @@
+# rendering the pages of the model from Jinja templates, in worker processes
+
+# SPDX-License-Identifier: Apache-2.0
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from jinja2 import Environment, FileSystemBytecodeCache, PackageLoader, select_autoescape
+
+from .model import ENTITY_DIRS, Namespace, _RecordCollector, attributes
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Jinja environments, by templates directory and bytecode cache directory
+_environments = dict()
+
+
+def jinja_environment(package_path, cache_path=None):
+    """
+    Return the Jinja environment for the templates in directory `package_path` of the package,
+    created on first use and then shared, so that each template is compiled once per process.
+    With `cache_path`, the compiled templates are also kept in that directory across runs.
+    The templates of the package do not change while running, so they are not checked for changes.
+    """
+    key = (package_path, cache_path)
+    if key not in _environments:
+        _environments[key] = Environment(
+            loader=PackageLoader("spec_parser", package_path=package_path),
+            autoescape=select_autoescape(),
+            trim_blocks=True,
+            lstrip_blocks=True,
+            auto_reload=False,
+            bytecode_cache=FileSystemBytecodeCache(_mkdir(cache_path)) if cache_path else None,
+        )
+    return _environments[key]
+
+
+def _mkdir(p):
+    p.mkdir(parents=True, exist_ok=True)
+    return str(p)
+
+
+class _Templates(dict):
+    # the templates of an environment, each one looked up once
+    def __init__(self, jinja):
+        super().__init__()
+        self.jinja = jinja
+
+    def __missing__(self, name):
+        self[name] = ret = self.jinja.get_template(name)
+        return ret
+
+
+def render_pages(model, pages, make_env, env_args=(), jobs=1):
+    """
+    Render the pages, given as (template name, namespace or entity), and return an iterator
+    over the rendered text of the pages, in the order of `pages`.
+    The Jinja environment is returned by `make_env(model, *env_args)`.
+    With several jobs, the pages are rendered in worker processes, each one with
+    the model and its own environment, and get only the template name and the key
+    of the namespace or entity; the log records of the workers are handled here, in order.
+    """
+    if jobs <= 1 or len(pages) <= 1:
+        templates = _Templates(make_env(model, *env_args))
+        return (_render(templates, tmplfname, o) for tmplfname, o in pages)
+    return _render_parallel(model, pages, make_env, env_args, jobs)
+
+
+def _render(templates, tmplfname, o):
+    with span(f"{templates.jinja.loader.package_path}/{tmplfname}", "render"):
+        return templates[tmplfname].render(attributes(o))
+
+
+def write_pages(model, pages, make_env, env_args=(), jobs=1):
+    """Render the pages, given as (output file, template name, namespace or entity), and write them as they are rendered."""
+    rendered = render_pages(model, [(tmplfname, o) for _, tmplfname, o in pages], make_env, env_args, jobs)
+    for (f, _, _), page in zip(pages, rendered, strict=True):
+        f.write_text(page)
+
+
+def _key(o):
+    if isinstance(o, Namespace):
+        return None, o.name
+    return _GROUPS[type(o)], o.fqname
+
+
+def _render_parallel(model, pages, make_env, env_args, jobs):
+    args = [(tmplfname, *_key(o)) for tmplfname, o in pages]
+    jobs = min(jobs, len(args))
+    chunksize = max(1, len(args) // (jobs * 4))
+    initargs = (logging.getLogger().level, model, make_env, env_args)
+    with (
+        span("render", "render", pages=len(args), jobs=jobs),
+        ProcessPoolExecutor(max_workers=jobs, initializer=_init_render_worker, initargs=initargs) as ex,
+    ):
+        for page, records in ex.map(_render_page, args, chunksize=chunksize):
+            for r in records:
+                logging.getLogger(r.name).handle(r)
+            yield page
+
+
+# entity class -> attribute of Model with the entities of that class
+_GROUPS = {kind: group for kind, group, _ in ENTITY_DIRS.values()}
+
+# the model and Jinja environment, in worker processes
+_worker = dict()
+
+
+def _init_render_worker(level, model, make_env, env_args):
+    root = logging.getLogger()
+    root.handlers = [_RecordCollector()]
+    root.setLevel(level)
+    _worker["model"] = model
+    _worker["namespaces"] = {ns.name: ns for ns in model.namespaces}
+    _worker["templates"] = _Templates(make_env(model, *env_args))
+
+
+def _render_page(args):
+    tmplfname, group, name = args
+    collector = logging.getLogger().handlers[0]
+    collector.records = []
+    o = _worker["namespaces"][name] if group is None else getattr(_worker["model"], group)[name]
+    page = _worker["templates"][tmplfname].render(attributes(o))
+    return page, collector.records
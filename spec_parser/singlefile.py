@@ -4,100 +4,115 @@
 
 import logging
 
-from jinja2 import Environment, PackageLoader, select_autoescape
+from .incremental import OutputManifest, fingerprint, templates_fingerprint
+from .model import attributes
+from .render import jinja_environment, render_pages
 
 logger = logging.getLogger(__name__)
 
+# hardwired order of namespaces in the document
+NAMESPACE_ORDER = (
+    "Core",
+    "Software",
+    "Security",
+    "Licensing",
+    "SimpleLicensing",
+    "ExpandedLicensing",
+    "Dataset",
+    "AI",
+    "Build",
+    "Lite",
+    "Extension",
+    "Hardware",
+    "Service",
+    "SupplyChain",
+    "Operations",
+    "FunctionalSafety",
+)
+
+ENTITY_PAGES = (
+    ("Classes", "classes", "class.md.j2"),
+    ("Properties", "properties", "property.md.j2"),
+    ("Vocabularies", "vocabularies", "vocabulary.md.j2"),
+    ("Individuals", "individuals", "individual.md.j2"),
+    ("Datatypes", "datatypes", "datatype.md.j2"),
+)
 
-def gen_singlefile(model, outpath, cfg):
-    jinja = Environment(
-        loader=PackageLoader("spec_parser", package_path="templates/singlefile"),
-        autoescape=select_autoescape(),
-        trim_blocks=True,
-        lstrip_blocks=True,
-    )
-    jinja.globals = cfg.all_as_dict
-    jinja.globals["show_name"] = show_name
-    jinja.globals["ext_property_name"] = ext_property_name
-    jinja.globals["not_none"] = lambda x: str(x) if x is not None else ""
 
+def gen_singlefile(model, outpath, cfg):
     output_file = outpath / "model.md"
-    p = outpath / "files"
-    p.mkdir()
-
-    for ns in model.namespaces:
-        d = p / ns.name
-        d.mkdir()
-        f = d / f"{ns.name}.md"
-
-        template = jinja.get_template("namespace.md.j2")
-        page = template.render(vars(ns))
-        f.write_text(page)
-
-    def _generate_in_dir(dirname, group, tmplfname):
-        for s in group.values():
-            in_ns = s.ns
-            d = p / in_ns.name / dirname
-            d.mkdir(exist_ok=True)
-            f = d / f"{s.name}.md"
-
-            template = jinja.get_template(tmplfname)
-            page = template.render(vars(s))
-            f.write_text(page)
-
-    _generate_in_dir("Classes", model.classes, "class.md.j2")
-    _generate_in_dir("Properties", model.properties, "property.md.j2")
-    _generate_in_dir("Vocabularies", model.vocabularies, "vocabulary.md.j2")
-    _generate_in_dir("Individuals", model.individuals, "individual.md.j2")
-    _generate_in_dir("Datatypes", model.datatypes, "datatype.md.j2")
-
-    namespaces = [ns.name for ns in model.namespaces]
-
-    def _add_content(f):
-        with output_file.open("a", encoding="utf-8") as of:
-            of.write(f.read_text(encoding="utf-8"))
+    files_path = outpath / "files" if cfg.singlefile_tree else None
+    manifest = OutputManifest(outpath, templates_fingerprint("templates/singlefile"), incremental=cfg.incremental)
+    env_args = (cfg.all_as_dict, cfg.cache_path / "jinja" if cfg.cache_path else None)
+
+    pages = [page for ns in model.namespaces for page in _pages(ns)]
+    digests = {rel: fingerprint(attributes(o)) for rel, _, _, o in pages} if manifest.incremental else dict()
+
+    # pages rendered for the tree of files, that are not rendered again for the document
+    rendered = dict()
+    if files_path is not None:
+        todo = []
+        for rel, _, tmplfname, o in pages:
+            f = files_path / rel
+            if not manifest.is_current(f, digests.get(rel)):
+                f.parent.mkdir(parents=True, exist_ok=True)
+                todo.append((rel, tmplfname, o))
+        tree_pages = render_pages(model, [(tmplfname, o) for _, tmplfname, o in todo], jinja_env, env_args, jobs=cfg.jobs)
+        for (rel, _, _), page in zip(todo, tree_pages, strict=True):
+            rendered[rel] = page
+            (files_path / rel).write_text(page)
+
+    # the document depends on the content of all the pages
+    uptodate = manifest.is_current(output_file, fingerprint(digests))
+    manifest.remove_obsolete()
+    if uptodate:
+        manifest.save()
+        return
+
+    namespaces = {ns.name: ns for ns in model.namespaces}
+    doc = [page for nsname in NAMESPACE_ORDER if nsname in namespaces for page in _pages(namespaces.pop(nsname))]
+    doc_pages = render_pages(model, [(tmplfname, o) for rel, _, tmplfname, o in doc if rel not in rendered], jinja_env, env_args, jobs=cfg.jobs)
+
+    # the document is written in one pass, in its final order
+    with output_file.open("w", encoding="utf-8") as of:
+        of.write(f"<-- {cfg.autogen_header} -->\n")
+        of.write("<!-- SPDX-License-Identifier: Community-Spec-1.0 -->\n\n")
+
+        section = None
+        for rel, subdirname, _, _ in doc:
+            if subdirname is not None and subdirname != section:
+                of.write(f"## {subdirname}\n\n")
+            section = subdirname
+            of.write(rendered.pop(rel) if rel in rendered else next(doc_pages))
             of.write("\n")
 
-    def _add_string(s):
-        with output_file.open("a", encoding="utf-8") as of:
-            of.write(s)
-
-    output_file.write_text(f"<-- {cfg.autogen_header} -->\n", encoding="utf-8")
-    _add_string("<!-- SPDX-License-Identifier: Community-Spec-1.0 -->\n\n")
-
-    # hardwired order of namespaces
-    for nsname in [
-        "Core",
-        "Software",
-        "Security",
-        "Licensing",
-        "SimpleLicensing",
-        "ExpandedLicensing",
-        "Dataset",
-        "AI",
-        "Build",
-        "Lite",
-        "Extension",
-        "Hardware",
-        "Service",
-        "SupplyChain",
-        "Operations",
-        "FunctionalSafety",
-    ]:
-        if nsname in namespaces:
-            f = p / nsname / f"{nsname}.md"
-            _add_content(f)
-            for subdirname in ["Classes", "Properties", "Vocabularies", "Individuals", "Datatypes"]:
-                subdir = p / nsname / subdirname
-                if subdir.is_dir():
-                    _add_string(f"## {subdirname}\n\n")
-                    for f in sorted(subdir.glob("*.md")):
-                        _add_content(f)
-            namespaces.remove(nsname)
-
     if namespaces:
         logger.warning("The following namespaces were not processed for singlefile generation: %s", ", ".join(namespaces))
 
+    manifest.save()
+
+
+def _pages(ns):
+    """
+    Return the pages of a namespace in the order of the document: the namespace,
+    then its entities by kind, sorted by name, as the path of their file in the tree,
+    the section they are in, their template, and the object they are rendered from.
+    """
+    ret = [(f"{ns.name}/{ns.name}.md", None, "namespace.md.j2", ns)]
+    for subdirname, group, tmplfname in ENTITY_PAGES:
+        entities = sorted(getattr(ns, group).values(), key=lambda s: f"{s.name}.md")
+        ret.extend((f"{ns.name}/{subdirname}/{s.name}.md", subdirname, tmplfname, s) for s in entities)
+    return ret
+
+
+def jinja_env(_model, globals_, cache_path=None):
+    jinja = jinja_environment("templates/singlefile", cache_path)
+    jinja.globals.update(globals_)
+    jinja.globals["show_name"] = show_name
+    jinja.globals["ext_property_name"] = ext_property_name
+    jinja.globals["not_none"] = lambda x: str(x) if x is not None else ""
+    return jinja
+
 
 def show_name(name, *, showshort=False):
     if name.startswith("/"):
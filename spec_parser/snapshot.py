@@ -0,0 +1,108 @@
+# saving and loading the parsed model as a compact snapshot
+
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import logging
+import sys
+
+from . import __version__
+from .model import ENTITY_DIRS, Model, Namespace, attributes
+
+logger = logging.getLogger(__name__)
+
+FORMAT = "spec-parser-snapshot"
+VERSION = 1
+
+# names, interned as when parsing the model files
+INTERNED = frozenset(("license", "name", "fqname", "fqsupercname"))
+
+# attributes computed by Model.process_after_load, that are not saved
+DERIVED = frozenset(("all_properties", "direct_subclasses", "inheritance_stack", "used_in"))
+
+
+def _table(objs, exclude, refs=None):
+    """
+    Return the objects as a table: the names of their attributes, stored once,
+    and a row of values per object, where attributes in `refs` are stored as indices.
+    """
+    if not objs:
+        return {"fields": [], "rows": []}
+    fields = [k for k in attributes(objs[0]) if k not in exclude]
+    rows = []
+    for o in objs:
+        d = attributes(o)
+        if d.keys() - exclude != set(fields):
+            msg = f"{type(o).__name__} {o.name} does not have the attributes {', '.join(fields)}"
+            raise ValueError(msg)
+        rows.append([refs[k][id(d[k])] if refs and k in refs else d[k] for k in fields])
+    return {"fields": fields, "rows": rows}
+
+
+def encode_snapshot(model):
+    """Return the snapshot of the model, as a string."""
+    nsindex = {id(ns): i for i, ns in enumerate(model.namespaces)}
+    groups = [group for _, group, _ in ENTITY_DIRS.values()]
+    data = {
+        "format": FORMAT,
+        "version": VERSION,
+        "spec_parser": __version__,
+        "name": model.name,
+        "namespaces": _table(model.namespaces, set(groups)),
+    }
+    for group in groups:
+        data[group] = _table(list(getattr(model, group).values()), DERIVED, {"ns": nsindex})
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def decode_snapshot(s):
+    """Return the model saved in snapshot string `s`, without parsing any model file."""
+    data = json.loads(s)
+    if not isinstance(data, dict) or data.get("format") != FORMAT:
+        msg = "not a spec-parser snapshot"
+        raise ValueError(msg)
+    if data.get("version") != VERSION:
+        msg = f"unsupported snapshot version {data.get('version')} (expected {VERSION})"
+        raise ValueError(msg)
+
+    try:
+        return _decode_model(data)
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        msg = f"malformed spec-parser snapshot: {e!r}"
+        raise ValueError(msg) from e
+
+
+def _decode_model(data):
+    m = Model()
+    m.name = data["name"]
+
+    def _objects(kind, table, groups=()):
+        fields = table["fields"]
+        for row in table["rows"]:
+            o = kind.__new__(kind)
+            for group in groups:
+                setattr(o, group, dict())
+            for k, v in zip(fields, row, strict=True):
+                setattr(o, k, sys.intern(v) if k in INTERNED and isinstance(v, str) else v)
+            yield o
+
+    m.namespaces.extend(_objects(Namespace, data["namespaces"], [group for _, group, _ in ENTITY_DIRS.values()]))
+
+    for kind, group, _ in ENTITY_DIRS.values():
+        for n in _objects(kind, data[group]):
+            n.ns = m.namespaces[n.ns]
+            getattr(m, group)[n.fqname] = n
+            getattr(n.ns, group)[n.fqname] = n
+
+    m.process_after_load()
+    return m
+
+
+def save_snapshot(model, fpath):
+    fpath.write_text(encode_snapshot(model), encoding="utf-8")
+
+
+def load_snapshot(fpath):
+    m = decode_snapshot(fpath.read_text(encoding="utf-8"))
+    logger.info(f"Loaded the model from snapshot {fpath!s}")
+    return m
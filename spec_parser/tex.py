@@ -2,52 +2,55 @@
 
 # SPDX-License-Identifier: Apache-2.0
 
+import hashlib
 import logging
+import os
+import re
 import subprocess
+import uuid
+from functools import cache
 
-from jinja2 import Environment, PackageLoader, select_autoescape
+from .incremental import OutputManifest, fingerprint, templates_fingerprint, write_if_changed
+from .model import attributes
+from .render import jinja_environment, write_pages
+from .tracing import span
 
 logger = logging.getLogger(__name__)
 
 def gen_tex(model, outpath, cfg):
-    jinja = Environment(
-        loader=PackageLoader("spec_parser", package_path="templates/tex"),
-        autoescape=select_autoescape(),
-        trim_blocks=True,
-        lstrip_blocks=True,
-    )
-    jinja.globals = cfg.all_as_dict
-    jinja.globals["not_none"] = lambda x: str(x) if x is not None else ""
-    jinja.globals["tex_escape"] = tex_escape
-    jinja.globals["markdown_to_tex"] = markdown_to_tex
-
     p = outpath
+    salt = fingerprint(templates_fingerprint("templates/tex"), pandoc_version())
+    manifest = OutputManifest(outpath, salt, incremental=cfg.incremental)
 
+    # find the pages to render, to convert all their Markdown at once
+    pages = []
     for ns in model.namespaces:
         d = p / ns.name
-        d.mkdir()
+        d.mkdir(exist_ok=True)
         f = d / f"{ns.name}.tex"
+        if not manifest.is_current(f, fingerprint(attributes(ns))):
+            pages.append((f, "namespace.tex.j2", ns))
 
-        template = jinja.get_template("namespace.tex.j2")
-        page = template.render(vars(ns))
-        f.write_text(page)
-
-    def _generate_in_dir(dirname, group, tmplfname):
+    def _add_pages_in_dir(dirname, group, tmplfname):
         for s in group.values():
             in_ns = s.ns
             d = p / in_ns.name / dirname
             d.mkdir(exist_ok=True)
             f = d / f"{s.name}.tex"
+            if not manifest.is_current(f, fingerprint(attributes(s))):
+                pages.append((f, tmplfname, s))
 
-            template = jinja.get_template(tmplfname)
-            page = template.render(vars(s))
-            f.write_text(page)
+    _add_pages_in_dir("Classes", model.classes, "class.tex.j2")
+    _add_pages_in_dir("Properties", model.properties, "property.tex.j2")
+    _add_pages_in_dir("Vocabularies", model.vocabularies, "vocabulary.tex.j2")
+    _add_pages_in_dir("Individuals", model.individuals, "individual.tex.j2")
+    _add_pages_in_dir("Datatypes", model.datatypes, "datatype.tex.j2")
 
-    _generate_in_dir("Classes", model.classes, "class.tex.j2")
-    _generate_in_dir("Properties", model.properties, "property.tex.j2")
-    _generate_in_dir("Vocabularies", model.vocabularies, "vocabulary.tex.j2")
-    _generate_in_dir("Individuals", model.individuals, "individual.tex.j2")
-    _generate_in_dir("Datatypes", model.datatypes, "datatype.tex.j2")
+    texcache = TexCache(cfg.cache_path / "tex", cfg.cache_size) if cfg.cache_path else None
+    md2tex = MarkdownConverter(cache=texcache)
+    md2tex.convert(collect_markdown(s for _, _, s in pages))
+    jinja_cache = cfg.cache_path / "jinja" if cfg.cache_path else None
+    write_pages(model, pages, jinja_env, (cfg.all_as_dict, md2tex, jinja_cache), jobs=cfg.jobs)
 
     def _gen_filelist(nsname, itemslist, heading):
         ret = []
@@ -98,7 +101,22 @@ def gen_tex(model, outpath, cfg):
         logger.warning("The following namespaces were not processed for TeX generation: %s", ", ".join(namespaces))
 
     fn = p / "model-files.tex"
-    fn.write_text("\n".join(filelines))
+    write_if_changed(fn, "\n".join(filelines))
+
+    manifest.save()
+
+    if texcache:
+        logger.info(f"TeX cache: {texcache.hits} hits, {texcache.misses} misses")
+        texcache.prune()
+
+
+def jinja_env(_model, globals_, md2tex, cache_path=None):
+    jinja = jinja_environment("templates/tex", cache_path)
+    jinja.globals.update(globals_)
+    jinja.globals["not_none"] = lambda x: str(x) if x is not None else ""
+    jinja.globals["tex_escape"] = tex_escape
+    jinja.globals["markdown_to_tex"] = md2tex
+    return jinja
 
 
 def tex_escape(s):
@@ -111,9 +129,179 @@ def tex_escape(s):
     return s
 
 
+PANDOC_ARGS = ("-f", "markdown", "-t", "latex")
+
+
 def markdown_to_tex(s):
-    # Call pandoc to convert from Markdown to TeX
-    process = subprocess.run(
-        ["pandoc", "-f", "markdown", "-t", "latex"], input=s.encode("utf-8"), capture_output=True, check=False
-    )
+    # Call pandoc to convert from Markdown to TeX, returning None if it fails
+    with span("pandoc", "pandoc", chars=len(s)):
+        process = subprocess.run(
+            ["pandoc", *PANDOC_ARGS], input=s.encode("utf-8"), capture_output=True, check=False
+        )
+    if process.returncode != 0:
+        stderr = process.stderr.decode("utf-8", errors="replace").strip()
+        logger.warning(f"pandoc failed with exit status {process.returncode}: {stderr}")
+        return None
     return process.stdout.decode("utf-8")
+
+
+@cache
+def pandoc_version():
+    process = subprocess.run(["pandoc", "--version"], capture_output=True, check=False)
+    return process.stdout.decode("utf-8").partition("\n")[0]
+
+
+def collect_markdown(entities):
+    """Return the Markdown fragments that the TeX templates convert for the given namespaces and entities, without duplicates."""
+    ret = []
+    for s in entities:
+        ret.append(s.description)
+        if getattr(s, "conformance", None):
+            ret.append(s.conformance)
+        if hasattr(s, "entries"):
+            ret.extend(s.entries.values())
+        if "pattern" in getattr(s, "format", {}):
+            ret.append("`" + s.format["pattern"] + "`")
+    return list(dict.fromkeys(ret))
+
+
+class MarkdownConverter:
+    """
+    Markdown to TeX conversion with a lookup table, filled by batched pandoc calls.
+    Fragments are joined into a single pandoc document, separated by unique
+    delimiter paragraphs, and the output is split back at those delimiters.
+    Fragments whose rendering may depend on the rest of the document
+    (headings, link references, footnotes, metadata, unbalanced blocks)
+    are converted one by one, so the result is the same as `markdown_to_tex`.
+    The converter is callable, and converts unknown fragments on the fly.
+    """
+
+    BATCH_SIZE = 500
+    RE_UNSAFE = re.compile(r"^(?:\s{0,3}(?:#|\[[^\]]*\]:|\(@|%|---|\.\.\.|=+\s*$|-+\s*$)|.*(?:\[\^|<!--))", re.MULTILINE)
+    RE_FENCE = re.compile(r"^\s{0,3}(?:```|~~~)", re.MULTILINE)
+
+    def __init__(self, batch_size=BATCH_SIZE, cache=None):
+        self.batch_size = batch_size
+        self.cache = cache
+        self.table = dict()
+        self.delimiter = "SPECPARSERFRAGMENT" + uuid.uuid4().hex
+        self.num_pandoc_calls = 0
+        # fragments that pandoc failed to convert, which are not cached
+        self.failed = set()
+
+    def __call__(self, s):
+        if s not in self.table:
+            self.convert([s])
+        return self.table[s]
+
+    def is_batchable(self, s):
+        return (
+            bool(s.strip())
+            and self.delimiter not in s
+            and self.RE_UNSAFE.search(s) is None
+            and len(self.RE_FENCE.findall(s)) % 2 == 0
+        )
+
+    def convert(self, fragments):
+        todo = [s for s in dict.fromkeys(fragments) if s not in self.table]
+        if self.cache:
+            for s in todo:
+                if (tex := self.cache.get(s)) is not None:
+                    self.table[s] = tex
+            todo = [s for s in todo if s not in self.table]
+        if not todo:
+            return
+        batchable = [s for s in todo if self.is_batchable(s)]
+        for s in todo:
+            if not self.is_batchable(s):
+                self.table[s] = self._convert_single(s)
+        for i in range(0, len(batchable), self.batch_size):
+            self._convert_batch(batchable[i : i + self.batch_size])
+        if self.cache:
+            for s in todo:
+                if s not in self.failed:
+                    self.cache.put(s, self.table[s])
+        logger.info(f"Converted {len(todo)} Markdown fragments to TeX with {self.num_pandoc_calls} pandoc calls")
+
+    def _convert_single(self, s):
+        self.num_pandoc_calls += 1
+        tex = markdown_to_tex(s)
+        if tex is None:
+            logger.error(f"Cannot convert Markdown to TeX: {s[:60]!r}")
+            self.failed.add(s)
+            return ""
+        return tex
+
+    def _convert_batch(self, batch):
+        self.num_pandoc_calls += 1
+        doc = "".join(f"{s}\n\n{self.delimiter}{i}\n\n" for i, s in enumerate(batch))
+        out = markdown_to_tex(doc)
+        parts = re.split(rf"\n\n{self.delimiter}(\d+)\n", out) if out is not None else []
+        # each part is preceded by the number of its delimiter, with nothing after the last one
+        if len(parts) != 2 * len(batch) + 1 or parts[1::2] != [str(i) for i in range(len(batch))] or parts[-1]:
+            logger.warning(f"Batched pandoc conversion of {len(batch)} fragments failed, converting them one by one")
+            for s in batch:
+                self.table[s] = self._convert_single(s)
+            return
+        for i, s in enumerate(batch):
+            part = parts[2 * i]
+            if i > 0:
+                part = part.removeprefix("\n")
+            self.table[s] = part + "\n"
+
+
+class TexCache:
+    """
+    Persistent cache of Markdown to TeX conversions, one file per entry.
+    Entries are addressed by a hash of the input text, the pandoc version
+    and the pandoc arguments; the modification time of an entry is its last
+    use, and the least recently used entries are evicted beyond `max_size` bytes.
+    """
+
+    def __init__(self, path, max_size):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._salt = "\0".join((pandoc_version(), *PANDOC_ARGS, "")).encode("utf-8")
+
+    def _entry(self, s):
+        key = hashlib.sha256(self._salt + s.encode("utf-8")).hexdigest()
+        return self.path / key[:2] / f"{key}.tex"
+
+    def get(self, s):
+        f = self._entry(s)
+        try:
+            ret = f.read_bytes().decode("utf-8")
+            os.utime(f)
+        except (OSError, UnicodeDecodeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return ret
+
+    def put(self, s, tex):
+        f = self._entry(s)
+        f.parent.mkdir(parents=True, exist_ok=True)
+        tmp = f.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(tex.encode("utf-8"))
+        tmp.replace(f)
+
+    def prune(self):
+        entries = []
+        for f in self.path.glob("*/*.tex"):
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, f))
+        size = sum(e[1] for e in entries)
+        evicted = 0
+        for _, fsize, f in sorted(entries):
+            if size <= self.max_size:
+                break
+            f.unlink(missing_ok=True)
+            size -= fsize
+            evicted += 1
+        if evicted:
+            logger.info(f"TeX cache: evicted {evicted} least recently used entries")
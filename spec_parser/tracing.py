@@ -0,0 +1,143 @@
+# recording the time and memory spent in the phases of a run, as a Chrome trace
+
+# SPDX-License-Identifier: Apache-2.0
+
+import atexit
+import json
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+
+# the Tracer of the run, when tracing
+_tracing = dict()
+
+_NO_SPAN = nullcontext()
+
+
+def span(name, cat="phase", **args):
+    """
+    Return a context manager recording the time spent in it, and the peak memory, as span `name`
+    of category `cat`, with the given arguments, when tracing; otherwise it does nothing.
+    """
+    tracer = _tracing.get("tracer")
+    if tracer is None:
+        return _NO_SPAN
+    return _Span(tracer, name, cat, args)
+
+
+def start_tracing(fpath):
+    """
+    Record spans from now on, and write them at exit in file `fpath`, as a Chrome trace
+    that Perfetto and chrome://tracing can show, and log a summary of the spans, at INFO
+    level, which is shown even without -v.
+    Memory is traced with tracemalloc, which slows down the run.
+    The work done in worker processes is only seen as the span waiting for it.
+    """
+    tracemalloc.start()
+    logger.setLevel(logging.INFO)
+    _tracing["tracer"] = tracer = Tracer()
+    atexit.register(_finish, tracer, fpath)
+    # worker processes do not record spans, and run at full speed
+    os.register_at_fork(after_in_child=_stop_in_child)
+
+
+def _stop_in_child():
+    if _tracing.pop("tracer", None) is not None:
+        tracemalloc.stop()
+
+
+def _finish(tracer, fpath):
+    del _tracing["tracer"]
+    tracemalloc.stop()
+    error = tracer.save(fpath)
+    if error is not None:
+        logger.error(f"Cannot write the trace to '{fpath}': {error}")
+    else:
+        logger.info(f"Trace written to {fpath}")
+    for line in tracer.summary():
+        logger.info(line)
+
+
+class Tracer:
+    """
+    The spans of a run, as Chrome trace events. Each open span keeps the peak traced memory
+    seen so far; the peak of tracemalloc is reset when a span starts, and the peak of a span
+    is also the peak of the span enclosing it.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.peaks = []
+        self.pid = os.getpid()
+        self.start = time.perf_counter_ns()
+
+    def begin(self):
+        current, peak = tracemalloc.get_traced_memory()
+        if self.peaks:
+            self.peaks[-1] = max(self.peaks[-1], peak)
+        tracemalloc.reset_peak()
+        self.peaks.append(current)
+        return time.perf_counter_ns()
+
+    def end(self, name, cat, args, ts):
+        dur = time.perf_counter_ns() - ts
+        peak = max(self.peaks.pop(), tracemalloc.get_traced_memory()[1])
+        if self.peaks:
+            self.peaks[-1] = max(self.peaks[-1], peak)
+        self.events.append(
+            {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": (ts - self.start) / 1000,
+                "dur": dur / 1000,
+                "pid": self.pid,
+                "tid": 1,
+                "args": {**args, "peak_memory": peak},
+            },
+        )
+
+    def save(self, fpath):
+        """Write the trace in file `fpath`, and return the error if it cannot be written."""
+        data = {"traceEvents": self.events, "displayTimeUnit": "ms"}
+        try:
+            fpath.write_text(json.dumps(data, default=str), encoding="utf-8")
+        except OSError as e:
+            return e
+        return None
+
+    def summary(self):
+        """Return the lines of a table with the number of spans, total time and peak memory of each name, in order of first start."""
+        totals = dict()
+        for e in sorted(self.events, key=lambda e: e["ts"]):
+            calls, dur, peak = totals.get((e["cat"], e["name"]), (0, 0, 0))
+            totals[e["cat"], e["name"]] = (calls + 1, dur + e["dur"], max(peak, e["args"]["peak_memory"]))
+        cwidth = max((len(cat) for cat, _ in totals), default=8)
+        nwidth = max((len(name) for _, name in totals), default=4)
+        ret = [f"{'category':<{cwidth}} {'name':<{nwidth}} {'calls':>7} {'seconds':>9} {'peak MiB':>9}"]
+        ret.extend(
+            f"{cat:<{cwidth}} {name:<{nwidth}} {calls:>7} {dur / 1e6:>9.3f} {peak / 2**20:>9.1f}"
+            for (cat, name), (calls, dur, peak) in totals.items()
+        )
+        return ret
+
+
+class _Span:
+    __slots__ = ("args", "cat", "name", "tracer", "ts")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.ts = self.tracer.begin()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.end(self.name, self.cat, self.args, self.ts)
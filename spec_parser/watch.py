@@ -0,0 +1,157 @@
+# watching the model directory, to regenerate the output on changes
+
+# SPDX-License-Identifier: Apache-2.0
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+
+from .model import Model
+
+logger = logging.getLogger(__name__)
+
+
+def _tree(path):
+    """Return all the files and directories below path, except hidden ones."""
+    return [f for f in path.rglob("*") if not any(part.startswith(".") for part in f.relative_to(path).parts)]
+
+
+class PollingWatcher:
+    """Find changed files by comparing the modification times and sizes of all files."""
+
+    def __init__(self, path, interval=0.5):
+        self.path = path
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        ret = dict()
+        for f in _tree(self.path):
+            try:
+                st = f.stat()
+            except FileNotFoundError:
+                continue
+            if not f.is_dir():
+                ret[f] = (st.st_mtime_ns, st.st_size)
+        return ret
+
+    def wait(self):
+        """Block until some files change, and return their paths."""
+        while True:
+            time.sleep(self.interval)
+            snapshot = self._scan()
+            changed = {f for f in snapshot.keys() | self.snapshot.keys() if snapshot.get(f) != self.snapshot.get(f)}
+            self.snapshot = snapshot
+            if changed:
+                return changed
+
+
+class InotifyWatcher:
+    """Find changed files with Linux inotify, watching every directory of the tree."""
+
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_ISDIR = 0x40000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = struct.Struct("iIII")
+
+    # time to wait for more events after the first one, since editors save in several steps
+    SETTLE = 0.1
+
+    def __init__(self, path):
+        self.path = path
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = dict()
+        self._add_tree(path)
+
+    def _add_tree(self, path):
+        ret = set()
+        for d in [path, *_tree(path)]:
+            if not d.is_dir():
+                ret.add(d)
+                continue
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(d), self.MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {d}")
+            self.dirs[wd] = d
+        return ret
+
+    def _read_events(self):
+        changed = set()
+        buf = os.read(self.fd, 65536)
+        i = 0
+        while i < len(buf):
+            wd, mask, _, namelen = self.EVENT.unpack_from(buf, i)
+            i += self.EVENT.size
+            name = os.fsdecode(buf[i : i + namelen].rstrip(b"\0"))
+            i += namelen
+            if wd not in self.dirs:
+                continue
+            f = self.dirs[wd] / name
+            if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                # files may have been created in the directory before it was watched
+                changed.update(self._add_tree(f))
+            changed.add(f)
+        return changed
+
+    def wait(self):
+        """Block until some files change, and return their paths."""
+        select.select([self.fd], [], [])
+        changed = self._read_events()
+        while select.select([self.fd], [], [], self.SETTLE)[0]:
+            changed |= self._read_events()
+        return changed
+
+
+def get_watcher(path):
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(path)
+        except (OSError, AttributeError) as e:
+            logger.info(f"Cannot use inotify ({e}), polling for changes instead")
+    return PollingWatcher(path)
+
+
+def watch(model, cfg):
+    """
+    Watch the input directory of the model, and regenerate the selected outputs on every change.
+    Only the changed files are parsed again, the model is processed again as in `Model.update`,
+    and the outputs are regenerated incrementally.
+    Without a model, as when loading it had errors, the whole model is loaded on the first change.
+    """
+    # the status lines are logged at INFO level, shown even without -v, and not counted as warnings
+    logger.setLevel(logging.INFO)
+    handler = logging.getLogger().handlers[0]
+    watcher = get_watcher(cfg.input_path)
+    logger.info(f"Watching {cfg.input_path} for changes, press Ctrl-C to stop.")
+    try:
+        while True:
+            changed = watcher.wait()
+            start = time.monotonic()
+            errors = handler.num_errors()
+            try:
+                if model is None:
+                    model = Model(cfg.input_path, jobs=cfg.jobs)
+                else:
+                    model.update(cfg.input_path, changed, jobs=cfg.jobs)
+                if handler.num_errors() == errors and not cfg.no_output:
+                    model.generate(cfg)
+            except Exception:
+                logger.exception("Processing the changes failed")
+            if handler.num_errors() > errors:
+                logger.error("Errors were logged, waiting for the next change.")
+            else:
+                logger.info(f"Updated in {time.monotonic() - start:.2f}s.")
+    except KeyboardInterrupt:
+        logger.info("Stopped watching.")